@@ -1,3 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from slide_json_parser import clean_and_parse_json, iter_slides
+from narration_engine import synthesize_segments, KOKORO_SAMPLE_RATE
+from tts_cache import TTSCache
+from audio_buffer import AudioBuffer
+from caption_alignment import align_words, group_captions, write_captions
+
+# Narration that was already synthesized is reused across runs
+tts_cache = TTSCache(tts_cache_dir, tts_cache_max_bytes)
+
+
 def save_to_simple_text(filename):
     final_result = run_llm("text", instructions=task_instruction)
 
@@ -12,98 +24,201 @@ def save_to_simple_text(filename):
     return final_result.strip()
 
 
-output = save_to_simple_text("my_result.txt")
-print("Returned:", output)
+# ✅ Function: Write streamed LLM text to a file as it arrives (and pass it on)
+def tee_to_file(chunks, filename):
+    with open(filename, "w", encoding="utf-8") as f:
+        for piece in chunks:
+            f.write(piece)
+            f.flush()
+            yield piece
+    print(f"✅ Text file saved: {filename}")
 
 
-def clean_and_parse_json(text_output):
+def save_to_simple_text_streaming(filename, chunks=None):
     """
-    Extracts valid JSON from LLM output and parses it safely.
+    Same as save_to_simple_text, but the file grows while the model is still
+    generating instead of being written once at the end.
     """
-    # ✅ Extract JSON part using regex (first {...} block)
-    json_match = re.search(r"\{.*\}", text_output, re.DOTALL)
-    if not json_match:
-        print("❌ No JSON object found in text.")
+    chunks = stream_llm("text") if chunks is None else chunks
+    final_result = "".join(tee_to_file(chunks, filename))
+
+    if not final_result.strip():
+        print("⚠️ No result returned from stream_llm")
         return None
+    return final_result.strip()
 
-    json_str = json_match.group(0).strip()
 
-    # ✅ Try loading with json
-    try:
-        return json.loads(json_str)
-    except json.JSONDecodeError:
-        print("⚠️ json.loads failed, trying ast.literal_eval...")
-        try:
-            return ast.literal_eval(json_str)
-        except Exception as e:
-            print("❌ Parsing failed completely:", e)
-            return None
+if __name__ == "__main__":
+    output = save_to_simple_text_streaming("my_result.txt")
+    print("Returned:", output)
 
 
-def generate_audio_from_slides(text_output, chunk_length_sec=60):
+# ✅ Function: Slide dict -> narration text
+def slide_narration_text(slide_content):
+    for heading, content in slide_content.items():
+        # ✅ Ensure content is a string
+        if not isinstance(content, str):
+            print(f"⏭️ Skipping {heading} (not a string)")
+            continue
+
+        # ✅ Clean up content
+        slide_content[heading] = content.strip()
+
+    # ✅ Convert slide content into text (paragraphs)
+    return " ".join([f"{k}: {v}" for k, v in slide_content.items()])
+
+
+# ✅ Function: Save one slide's mastered narration as a WAV file
+def save_slide_audio(
+    slide_num,
+    combined_audio,
+    headless=narration_headless,
+    in_memory=False,
+    text=None,
+    words=None,
+    audio_dir=r"../my_audios",
+):
     """
-    Generate separate audio files for each slide in JSON.
+    Returns the WAV path, or with in_memory=True an AudioBuffer that the video
+    step can use directly (no file is written). combined_audio comes from
+    synthesize_segments, already trimmed and levelled.
+
+    Word timings (from synthesize_segments, or aligned here from text) are
+    written next to the audio as slide<N>_audio.srt and .vtt captions.
+    """
+
+    # Save audio file for this slide
+    Audio_file_name = f"slide{slide_num}_audio.wav"
+    my_audio_file_path = os.path.join(audio_dir, Audio_file_name)
+
+    # Word timings are already relative to the mastered audio
+    if words is None and text:
+        words = align_words(text.split(), combined_audio, KOKORO_SAMPLE_RATE)
+    if words:
+        cues = group_captions(words)
+        caption_base = os.path.splitext(my_audio_file_path)[0]
+        write_captions(cues, f"{caption_base}.srt")
+        write_captions(cues, f"{caption_base}.vtt")
+
+    if in_memory:
+        buffer = AudioBuffer(combined_audio, KOKORO_SAMPLE_RATE, label=Audio_file_name)
+        print(f"✅ Kept {buffer} in memory")
+        if not headless:
+            display(Audio(data=buffer.samples, rate=KOKORO_SAMPLE_RATE))
+        return buffer
+
+    wavfile.write(my_audio_file_path, KOKORO_SAMPLE_RATE, combined_audio)
+
+    print(f"✅ Saved {my_audio_file_path}")
+    if not headless:
+        display(Audio(my_audio_file_path))
+    return my_audio_file_path
+
+
+# ✅ Function: Narrate one slide with Kokoro and save it as a WAV file
+def generate_slide_audio(slide_num, slide_name, slide_content, headless=narration_headless):
+    text_data = slide_narration_text(slide_content)
+
+    print(f"\n🎤 Generating audio for {slide_name}...")
+
+    # Step 1: Generate audio narration (shared, already-loaded pipeline)
+    word_timings = []
+    combined_audio = synthesize_segments(
+        [text_data],
+        num_threads=kokoro_threads,
+        headless=headless,
+        cache=tts_cache,
+        crossfade_ms=narration_crossfade_ms,
+        word_timings=word_timings,
+        target_db=narration_target_db,
+        threshold_db=narration_silence_db,
+    )[0]
+    if combined_audio is None:
+        return None
+    return save_slide_audio(
+        slide_num, combined_audio, headless, text=text_data, words=word_timings[0]
+    )
+
+
+def generate_audio_from_slides(
+    text_output, chunk_length_sec=60, headless=narration_headless, in_memory=False, audio_dir=r"../my_audios"
+):
+    """
+    Generate separate audio files for each slide in JSON
+    (or AudioBuffers with in_memory=True), written to audio_dir.
     """
     slides = clean_and_parse_json(text_output)
     if not slides:
         print("❌ Could not parse JSON")
         return None
 
-    saved_files = []
-
-    for i, (slide_name, slide_content) in enumerate(slides.items(), start=1):
-        # ✅ Skip non-dictionary entries (like "topic_name")
+    # ✅ Skip non-dictionary entries (like "topic_name")
+    slide_texts = []
+    for slide_name, slide_content in slides.items():
         if not isinstance(slide_content, dict):
             print(f"⏭️ Skipping {slide_name} (not a slide dictionary)")
             continue
+        slide_texts.append(slide_narration_text(slide_content))
+
+    # ✅ All slides go through one Kokoro pipeline in a single batch
+    print(f"\n🎤 Generating audio for {len(slide_texts)} slides...")
+    word_timings = []
+    slide_audio = synthesize_segments(
+        slide_texts,
+        num_threads=kokoro_threads,
+        headless=headless,
+        cache=tts_cache,
+        crossfade_ms=narration_crossfade_ms,
+        word_timings=word_timings,
+        target_db=narration_target_db,
+        threshold_db=narration_silence_db,
+    )
 
-        for heading_idx, (heading, content) in enumerate(slide_content.items()):
-            # ✅ Ensure content is a string
-            if not isinstance(content, str):
-                print(f"⏭️ Skipping {heading} (not a string)")
-                continue
-
-            # ✅ Clean up content
-            slide_content[heading] = content.strip()
-
-        # ✅ Convert slide content into text (paragraphs)
-        text_data = " ".join([f"{k}: {v}" for k, v in slide_content.items()])
-
-        print(f"\n🎤 Generating audio for {slide_name}...")
-
-        # Step 1: Generate audio narration
-        pipeline = KPipeline(lang_code="a")
-        generator = pipeline(text_data, voice="am_onyx", speed=1)
-
-        audio_data = []
-        for j, (gs, ps, audio) in enumerate(generator):
-            display(Audio(data=audio, rate=24000, autoplay=(j == 0)))
-            audio_data.append(audio)
+    saved_files = []
+    for combined_audio, text_data, words in zip(slide_audio, slide_texts, word_timings):
+        if combined_audio is None:
+            continue
+        # ✅ Use slide index based on actual slides processed
+        saved_files.append(
+            save_slide_audio(
+                len(saved_files) + 1, combined_audio, headless, in_memory, text_data, words, audio_dir
+            )
+        )
 
-        if audio_data:
-            combined_audio = np.concatenate(audio_data)
+    return saved_files
 
-            # Normalize
-            max_val = np.max(np.abs(combined_audio))
-            if max_val > 0:
-                combined_audio = combined_audio / max_val * 0.9
 
-            # Save audio file for this slide
-            # ✅ Use slide index based on actual slides processed
-            slide_num = len(saved_files) + 1
-            Audio_file_name = f"slide{slide_num}_audio.wav"
-            my_audio_file_path = rf"../my_audios/{Audio_file_name}"
+# ✅ Function: Start narrating slides while the LLM is still writing later ones
+def generate_audio_from_stream(chunks, filename="my_result.txt"):
+    """
+    Streams the "text" mode answer into filename and synthesizes each slide on a
+    background thread as soon as its JSON is complete, so LLM generation and
+    TTS overlap. Returns (full_text, saved_files).
+    """
+    received = []
 
-            wavfile.write(my_audio_file_path, 24000, combined_audio)
-            saved_files.append(my_audio_file_path)
+    def remember(pieces):
+        for piece in pieces:
+            received.append(piece)
+            yield piece
 
-            print(f"✅ Saved {my_audio_file_path}")
-            display(Audio(my_audio_file_path))
+    futures = []
+    with ThreadPoolExecutor(max_workers=1) as tts_worker:
+        slide_num = 0
+        for slide_name, slide_content in iter_slides(
+            remember(tee_to_file(chunks, filename))
+        ):
+            slide_num += 1
+            print(f"📥 {slide_name} received, narrating while the rest streams in...")
+            futures.append(
+                tts_worker.submit(generate_slide_audio, slide_num, slide_name, slide_content)
+            )
 
-    return saved_files
+    saved_files = [f.result() for f in futures if f.result()]
+    return "".join(received).strip(), saved_files
 
 
 # Usage
-text_output = save_to_simple_text("my_result.txt")
-audio_files = generate_audio_from_slides(text_output)
-print("All audios generated:", audio_files)
+if __name__ == "__main__":
+    text_output, audio_files = generate_audio_from_stream(stream_llm("text"), "my_result.txt")
+    print("All audios generated:", audio_files)
@@ -0,0 +1,121 @@
+import io
+
+import numpy as np
+
+from audio_postprocess import normalize_narration, DEFAULT_TARGET_DB, DEFAULT_SILENCE_DB
+
+
+# ✅ Class: Narration audio kept in memory as PCM samples
+class AudioBuffer:
+    """
+    Float32 samples in [-1, 1] (mono, or shape (n, channels)) plus sample rate.
+    gTTS MP3 bytes are decoded exactly once; Kokoro output is wrapped as is.
+    Can be handed to create_srt_file / create_slides_video_with_audio in place
+    of an audio file path.
+    """
+
+    def __init__(self, samples, sample_rate, label=""):
+        self.samples = np.asarray(samples, dtype=np.float32)
+        self.sample_rate = int(sample_rate)
+        self.label = label
+
+    @classmethod
+    def from_mp3_bytes(cls, data, label=""):
+        from pydub import AudioSegment
+
+        segment = AudioSegment.from_file(io.BytesIO(data), format="mp3")
+        samples = np.array(segment.get_array_of_samples(), dtype=np.float32)
+        samples /= float(1 << (8 * segment.sample_width - 1))
+        if segment.channels > 1:
+            samples = samples.reshape(-1, segment.channels)
+        return cls(samples, segment.frame_rate, label)
+
+    @classmethod
+    def from_wav_bytes(cls, data, label=""):
+        from tts_cache import decode_wav
+
+        samples, sample_rate = decode_wav(data)
+        return cls(samples, sample_rate, label)
+
+    @classmethod
+    def from_file(cls, path, label=None):
+        # gTTS writes .mp3; anything else is read as WAV
+        with open(path, "rb") as f:
+            data = f.read()
+        label = path if label is None else label
+        if path.lower().endswith(".mp3"):
+            return cls.from_mp3_bytes(data, label)
+        return cls.from_wav_bytes(data, label)
+
+    @property
+    def duration(self):
+        return self.samples.shape[0] / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def peak(self):
+        return float(np.max(np.abs(self.samples))) if self.samples.size else 0.0
+
+    def stereo(self):
+        if self.samples.ndim == 1:
+            return np.column_stack([self.samples, self.samples])
+        if self.samples.shape[1] == 1:
+            return np.repeat(self.samples, 2, axis=1)
+        return self.samples
+
+    def normalized(self, target_db=DEFAULT_TARGET_DB, threshold_db=DEFAULT_SILENCE_DB):
+        """
+        Silence-trimmed copy levelled to target_db (see audio_postprocess).
+        """
+        samples = normalize_narration(self.samples, self.sample_rate, target_db, threshold_db)
+        return AudioBuffer(samples, self.sample_rate, self.label)
+
+    def to_audio_clip(self):
+        """
+        MoviePy clip backed by the in-memory samples (no file is written).
+        """
+        from moviepy.audio.AudioClip import AudioArrayClip
+
+        return AudioArrayClip(self.stereo(), fps=self.sample_rate)
+
+    def write_wav(self, path):
+        from tts_cache import encode_wav
+
+        mono = self.samples if self.samples.ndim == 1 else self.samples.mean(axis=1)
+        with open(path, "wb") as f:
+            f.write(encode_wav(mono, self.sample_rate))
+        return path
+
+    def __repr__(self):
+        return f"AudioBuffer({self.label!r}, {self.duration:.2f}s @ {self.sample_rate} Hz)"
+
+
+# ✅ Function: Duration of an AudioBuffer or an audio file path
+def audio_duration(audio, fallback=5):
+    if isinstance(audio, AudioBuffer):
+        return audio.duration
+    try:
+        from moviepy.editor import AudioFileClip
+
+        audio_clip = AudioFileClip(audio)
+        duration = audio_clip.duration
+        audio_clip.close()
+        return duration
+    except Exception:
+        return fallback
+
+
+# ✅ Function: Join buffers into one track (resampled to the first buffer's rate)
+def concatenate_buffers(buffers, label=""):
+    buffers = list(buffers)
+    if not buffers:
+        return AudioBuffer(np.zeros(0, dtype=np.float32), 24000, label)
+    sample_rate = buffers[0].sample_rate
+    parts = []
+    for buffer in buffers:
+        samples = buffer.samples if buffer.samples.ndim == 1 else buffer.samples.mean(axis=1)
+        if buffer.sample_rate != sample_rate and samples.size:
+            length = int(round(samples.shape[0] * sample_rate / buffer.sample_rate))
+            positions = np.linspace(0, samples.shape[0] - 1, length)
+            samples = np.interp(positions, np.arange(samples.shape[0]), samples)
+        parts.append(samples)
+    return AudioBuffer(np.concatenate(parts), sample_rate, label)
@@ -0,0 +1,179 @@
+import numpy as np
+
+
+DEFAULT_TARGET_DB = -20.0  # gated RMS loudness, dBFS
+DEFAULT_SILENCE_DB = -50.0  # frames quieter than this count as silence
+DEFAULT_PEAK_CEILING = 0.95
+MAX_GAIN_DB = 20.0  # never boost near-silent takes into loud noise
+
+
+def _mono(samples):
+    samples = np.asarray(samples, dtype=np.float32)
+    return samples.mean(axis=1) if samples.ndim > 1 else samples
+
+
+def _block_power(squares_cumsum, block, hop):
+    """
+    Mean power of every block of `block` samples, one block per `hop` samples,
+    read from the cumulative sum of squares (no per-block loop).
+    """
+    n = squares_cumsum.shape[0] - 1
+    if n < block:
+        return squares_cumsum[-1:] / max(n, 1)
+    starts = np.arange(0, n - block + 1, hop)
+    return (squares_cumsum[starts + block] - squares_cumsum[starts]) / block
+
+
+def _ramp(length):
+    return np.linspace(0.0, 1.0, length + 2, dtype=np.float32)[1:-1]
+
+
+# ✅ Function: First and last sample worth keeping
+def trim_bounds(samples, sample_rate, threshold_db=DEFAULT_SILENCE_DB, pad_ms=80, squares_cumsum=None):
+    """
+    Returns (start, end) around the non-silent part (20 ms frames above
+    threshold_db), padded by pad_ms so consonants are not clipped.
+    Fully silent audio is returned untouched.
+    """
+    samples = _mono(samples)
+    if squares_cumsum is None:
+        squares_cumsum = np.concatenate([[0.0], np.cumsum(np.square(samples, dtype=np.float64))])
+    frame = max(1, int(sample_rate * 0.02))
+    power = _block_power(squares_cumsum, frame, frame)
+    voiced = np.flatnonzero(10 * np.log10(power + 1e-12) > threshold_db)
+    if voiced.size == 0:
+        return 0, samples.shape[0]
+
+    pad = int(sample_rate * pad_ms / 1000)
+    start = max(0, voiced[0] * frame - pad)
+    end = min(samples.shape[0], (voiced[-1] + 1) * frame + pad)
+    return start, end
+
+
+def _loudness_blocks(squares_cumsum, sample_rate):
+    # Power of 400 ms blocks with 75% overlap
+    block = max(1, int(sample_rate * 0.4))
+    return _block_power(squares_cumsum, block, max(1, block // 4))
+
+
+def _gated_db(power):
+    power = power[power > 10 ** (-70 / 10)]
+    if power.size == 0:
+        return -np.inf
+    power = power[power > power.mean() * 10 ** (-10 / 10)]
+    return 10 * np.log10(power.mean())
+
+
+def _gain(loudness, peak, target_db, peak_ceiling):
+    gain = 1.0
+    if target_db is not None and np.isfinite(loudness):
+        gain = 10 ** (min(target_db - loudness, MAX_GAIN_DB) / 20)
+    if peak_ceiling and peak * gain > peak_ceiling:
+        gain = peak_ceiling / peak
+    return gain
+
+
+# ✅ Function: Loudness with BS.1770-style gating (plain RMS, no K-weighting)
+def gated_loudness_db(samples, sample_rate, squares_cumsum=None):
+    """
+    400 ms blocks with 75% overlap; blocks below -70 dB, then blocks 10 dB
+    under the mean, are ignored so pauses do not drag the level down.
+    """
+    samples = _mono(samples)
+    if squares_cumsum is None:
+        squares_cumsum = np.concatenate([[0.0], np.cumsum(np.square(samples, dtype=np.float64))])
+    return _gated_db(_loudness_blocks(squares_cumsum, sample_rate))
+
+
+# ✅ Function: Trim, level and crossfade narration segments in one pass
+def master_segments(
+    segments,
+    sample_rate,
+    target_db=DEFAULT_TARGET_DB,
+    threshold_db=DEFAULT_SILENCE_DB,
+    pad_ms=80,
+    crossfade_ms=0,
+    peak_ceiling=DEFAULT_PEAK_CEILING,
+    level="segment",
+    trim_inner=True,
+):
+    """
+    Every segment is trimmed (threshold_db=None keeps silence), brought to
+    target_db (None keeps the level, the gain is capped so no peak exceeds
+    peak_ceiling) and written once into a single preallocated output, with
+    crossfade_ms of overlap between neighbours.
+
+    level="whole" applies one gain from the gated loudness of all segments
+    together (one narration split into chunks) instead of levelling each.
+    trim_inner=False only trims the start of the first and the end of the
+    last segment. Squares and block powers are computed once per segment.
+
+    Returns (audio, starts, bounds): float32 mono samples, the sample offset
+    where each segment begins in it, and the (start, end) of each input
+    segment that was kept.
+    """
+    spans = []
+    last = len(segments) - 1
+    for i, samples in enumerate(segments):
+        samples = _mono(samples)
+        squares_cumsum = np.concatenate([[0.0], np.cumsum(np.square(samples, dtype=np.float64))])
+        start, end = 0, samples.shape[0]
+        if threshold_db is not None and (trim_inner or i in (0, last)):
+            start, end = trim_bounds(samples, sample_rate, threshold_db, pad_ms, squares_cumsum)
+            if not trim_inner:
+                start, end = (start if i == 0 else 0), (end if i == last else samples.shape[0])
+        piece = samples[start:end]
+
+        # Reuse the running sum of squares instead of squaring again
+        blocks = None
+        if target_db is not None and piece.size:
+            blocks = _loudness_blocks(squares_cumsum[start : end + 1] - squares_cumsum[start], sample_rate)
+        peak = float(np.max(np.abs(piece))) if piece.size else 0.0
+        spans.append([piece, blocks, peak, (int(start), int(end))])
+
+    if level == "whole":
+        powers = [blocks for _, blocks, _, _ in spans if blocks is not None]
+        loudness = _gated_db(np.concatenate(powers)) if powers else -np.inf
+        gain = _gain(loudness, max((peak for _, _, peak, _ in spans), default=0.0), target_db, peak_ceiling)
+        gains = [gain] * len(spans)
+    else:
+        gains = [
+            _gain(_gated_db(blocks) if blocks is not None else -np.inf, peak, target_db, peak_ceiling)
+            for _, blocks, peak, _ in spans
+        ]
+    bounds = [bound for _, _, _, bound in spans]
+    spans = [(piece, gain) for (piece, _, _, _), gain in zip(spans, gains)]
+
+    # Overlap between neighbours can never exceed half of the shorter one
+    fade = int(sample_rate * crossfade_ms / 1000)
+    overlaps = [
+        min(fade, spans[i][0].shape[0] // 2, spans[i + 1][0].shape[0] // 2)
+        for i in range(len(spans) - 1)
+    ]
+    total = sum(piece.shape[0] for piece, _ in spans) - sum(overlaps)
+    audio = np.zeros(max(total, 0), dtype=np.float32)
+    scratch = np.empty(max((piece.shape[0] for piece, _ in spans), default=0), dtype=np.float32)
+
+    starts = []
+    pos = 0
+    for i, (piece, gain) in enumerate(spans):
+        length = piece.shape[0]
+        fade_in = overlaps[i - 1] if i > 0 else 0
+        fade_out = overlaps[i] if i < len(overlaps) else 0
+
+        work = scratch[:length]
+        np.multiply(piece, gain, out=work)
+        if fade_in:
+            work[:fade_in] *= _ramp(fade_in)
+        if fade_out:
+            work[length - fade_out :] *= _ramp(fade_out)[::-1]
+        audio[pos : pos + length] += work
+
+        starts.append(pos)
+        pos += length - fade_out
+    return audio, starts, bounds
+
+
+# ✅ Function: Trim and level a single narration
+def normalize_narration(samples, sample_rate, target_db=DEFAULT_TARGET_DB, threshold_db=DEFAULT_SILENCE_DB):
+    return master_segments([samples], sample_rate, target_db, threshold_db)[0]
@@ -0,0 +1,153 @@
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+# ✅ Function: Does this error mean "slow down"?
+def is_rate_limit_error(error):
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return any(
+        marker in message
+        for marker in ("429", "rate limit", "resource_exhausted", "resource exhausted", "quota")
+    )
+
+
+# ✅ Function: Call fn, retrying with exponential backoff on rate-limit errors
+def with_backoff(fn, max_retries=5, base_delay=1.0, max_delay=60.0):
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_rate_limit_error(e):
+                raise
+            delay = min(max_delay, base_delay * (2**attempt)) * (0.5 + random.random() / 2)
+            print(f"⏳ Rate limited, retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
+            attempt += 1
+
+
+# ✅ Function: Upsert callback for a Pinecone index
+def pinecone_upserter(index, namespace, text_key="text"):
+    """
+    Returns upsert_batch(ids, vectors, metadatas) writing records in the layout
+    PineconeVectorStore expects (chunk text stored under text_key).
+    """
+
+    def upsert_batch(ids, vectors, metadatas):
+        records = [
+            {"id": cid, "values": vector, "metadata": metadata}
+            for cid, vector, metadata in zip(ids, vectors, metadatas)
+        ]
+        index.upsert(vectors=records, namespace=namespace)
+
+    upsert_batch.text_key = text_key
+    return upsert_batch
+
+
+# ✅ Function: Embed and upsert documents in concurrent batches
+def embed_and_upsert(
+    documents,
+    ids,
+    embeddings,
+    upsert_batch,
+    batch_size=64,
+    max_workers=4,
+    max_retries=5,
+):
+    """
+    Splits documents into batches of batch_size and runs at most max_workers
+    embed+upsert batches at the same time. Each step is retried with backoff
+    when the API reports a rate limit. Returns the number of upserted records.
+    """
+    text_key = getattr(upsert_batch, "text_key", "text")
+    batches = [
+        (documents[start : start + batch_size], ids[start : start + batch_size])
+        for start in range(0, len(documents), batch_size)
+    ]
+
+    def run_batch(batch_docs, batch_ids):
+        texts = [doc.page_content for doc in batch_docs]
+        vectors = with_backoff(lambda: embeddings.embed_documents(texts), max_retries)
+        metadatas = [{**doc.metadata, text_key: doc.page_content} for doc in batch_docs]
+        with_backoff(lambda: upsert_batch(batch_ids, vectors, metadatas), max_retries)
+        return len(batch_ids)
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(run_batch, docs, bids) for docs, bids in batches]
+        for future in as_completed(futures):
+            done += future.result()
+            print(f"📤 Upserted {done}/{len(ids)} chunks")
+    return done
+
+
+# ✅ Function: Read the vector count of one namespace from index stats
+def namespace_vector_count(index, namespace):
+    stats = index.describe_index_stats()
+    namespaces = getattr(stats, "namespaces", None)
+    if namespaces is None:
+        namespaces = stats.get("namespaces", {})
+    summary = namespaces.get(namespace)
+    if summary is None:
+        return 0
+    count = getattr(summary, "vector_count", None)
+    if count is None:
+        count = summary.get("vector_count", 0)
+    return count
+
+
+def _pending_ids(index, namespace, ids, present):
+    """
+    The ids whose presence in the index is not yet `present`, fetched in batches of 100.
+    """
+    pending = []
+    for start in range(0, len(ids), 100):
+        batch = ids[start : start + 100]
+        response = index.fetch(ids=batch, namespace=namespace)
+        vectors = getattr(response, "vectors", None)
+        if vectors is None:
+            vectors = response.get("vectors", {})
+        pending += [cid for cid in batch if (cid in vectors) != present]
+    return pending
+
+
+# ✅ Function: Which ids are not in the store (Pinecone index or LocalVectorStore)
+def missing_ids(store, namespace, ids):
+    """
+    Checks what the manifest claims against the store itself, so chunks lost
+    with a wiped index or a deleted local store are embedded again.
+    """
+    ids = list(dict.fromkeys(ids))
+    if hasattr(store, "get_by_ids"):
+        found = {doc.id for doc in store.get_by_ids(ids, namespace=namespace)}
+        return [cid for cid in ids if cid not in found]
+    return _pending_ids(store, namespace, ids, present=True)
+
+
+# ✅ Function: Wait until upserted ids are readable and deleted ids are gone
+def wait_for_ids(index, namespace, upserted_ids=(), deleted_ids=(), timeout=60.0, poll_interval=1.0):
+    """
+    Polls index.fetch for the ids themselves instead of comparing vector
+    counts, which are off whenever an "upserted" id was already stored
+    (shared chunks, first run against a populated index).
+    Returns True once the index reflects the changes, False on timeout.
+    """
+    upserted = list(dict.fromkeys(upserted_ids))
+    deleted = list(dict.fromkeys(deleted_ids))
+    deadline = time.monotonic() + timeout
+    delay = poll_interval
+    while True:
+        # Ids already confirmed are not fetched again
+        upserted = _pending_ids(index, namespace, upserted, present=True)
+        deleted = _pending_ids(index, namespace, deleted, present=False)
+        if not upserted and not deleted:
+            return True
+        if time.monotonic() >= deadline:
+            print(f"⚠️ Index not updated yet: {len(upserted)} upserts missing, {len(deleted)} deletes pending")
+            return False
+        time.sleep(delay)
+        delay = min(delay * 1.5, 5.0)
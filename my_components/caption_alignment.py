@@ -0,0 +1,184 @@
+import re
+
+import numpy as np
+
+
+SENTENCE_END = re.compile(r"[.!?;:]$")
+
+
+def _mono(samples):
+    samples = np.asarray(samples, dtype=np.float32)
+    return samples.mean(axis=1) if samples.ndim > 1 else samples
+
+
+def _word_weights(words):
+    # Spoken length roughly follows the number of letters; +1 for the gap after a word
+    return np.array([len(re.sub(r"\W", "", word)) + 1 for word in words], dtype=np.float64)
+
+
+def _snap_to_pauses(words, weights, bounds, voiced, speech_time, min_pause):
+    """
+    Move the word boundary closest to each pause (in speech time) onto it and
+    spread the other boundaries proportionally between these anchors.
+    """
+    edges = np.diff(np.concatenate([[1], voiced.astype(np.int8), [1]]))
+    pause_starts = np.flatnonzero(edges == -1)
+    pause_ends = np.flatnonzero(edges == 1)
+    inner = (pause_ends - pause_starts >= max(min_pause, 1)) & (pause_starts > 0) & (pause_ends < voiced.shape[0])
+    if not inner.any() or len(words) < 2:
+        return bounds
+
+    # Speech time already spoken when each pause begins
+    positions = speech_time[pause_starts[inner] - 1].astype(np.float64)
+    penalty = np.array([0.4 if SENTENCE_END.search(word) else 1.0 for word in words[:-1]])
+    anchors = {0: 0.0, len(words): float(speech_time[-1])}
+    for position in positions:
+        k = int(np.argmin(np.abs(bounds[1:-1] - position) * penalty)) + 1
+        anchors.setdefault(k, position)
+
+    ks = np.array(sorted(anchors))
+    ps = np.maximum.accumulate(np.array([anchors[k] for k in ks]))
+    return np.interp(weights, weights[ks], ps)
+
+
+# ✅ Function: Per-word timestamps from the audio energy (no TTS timing needed)
+def align_words(words, samples, sample_rate, offset=0.0, frame_ms=10, floor_db=35.0, min_pause_ms=150):
+    """
+    Lightweight forced alignment: 10 ms frames louder than (loudest frame -
+    floor_db) count as speech, and the words share the speech time in
+    proportion to their length, so pauses between sentences get no words.
+    Each pause of at least min_pause_ms is pinned to the nearest word
+    boundary (sentence punctuation preferred), which stops drift.
+    Returns [(word, start_seconds, end_seconds)], shifted by offset.
+    """
+    words = [word for word in words if word.strip()]
+    samples = _mono(samples)
+    if not words:
+        return []
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = samples.shape[0] // frame
+    if n_frames == 0:
+        return [(word, offset, offset) for word in words]
+
+    power = np.square(samples[: n_frames * frame].reshape(n_frames, frame), dtype=np.float64).mean(axis=1)
+    level_db = 10 * np.log10(power + 1e-12)
+    voiced = level_db > level_db.max() - floor_db
+    speech_time = np.cumsum(voiced)
+
+    weights = np.concatenate([[0.0], np.cumsum(_word_weights(words))])
+    bounds = weights / weights[-1] * speech_time[-1]
+    bounds = _snap_to_pauses(words, weights, bounds, voiced, speech_time, int(min_pause_ms / frame_ms))
+    # A word starts at the first speech frame after its share begins and ends
+    # with the frame that completes it, so pauses fall between words
+    starts = np.searchsorted(speech_time, bounds[:-1], side="right")
+    ends = np.maximum(np.searchsorted(speech_time, bounds[1:], side="left") + 1, starts)
+    # The +1 frame must not reach into the next word, or consecutive cues overlap
+    ends[:-1] = np.maximum(np.minimum(ends[:-1], starts[1:]), starts[:-1])
+    starts = offset + np.minimum(starts, n_frames) * frame / sample_rate
+    ends = offset + np.minimum(ends, n_frames) * frame / sample_rate
+    return [(word, float(starts[i]), float(ends[i])) for i, word in enumerate(words)]
+
+
+# ✅ Function: Word timings from Kokoro tokens (start_ts / end_ts)
+def words_from_tokens(tokens, offset=0.0):
+    """
+    Returns None when the pipeline gave no timestamps (non-English voices),
+    so the caller can fall back to align_words.
+    """
+    words = []
+    for token in tokens or []:
+        text = getattr(token, "text", "").strip()
+        start, end = getattr(token, "start_ts", None), getattr(token, "end_ts", None)
+        if not text:
+            continue
+        if start is None or end is None:
+            return None
+        # Punctuation tokens belong to the word before them
+        if words and not re.search(r"\w", text):
+            word, word_start, _ = words[-1]
+            words[-1] = (word + text, word_start, float(offset + end))
+            continue
+        words.append((text, float(offset + start), float(offset + end)))
+    return words or None
+
+
+# ✅ Function: Group timed words into caption cues
+def group_captions(words, max_words=6, max_seconds=4.0, max_pause=0.6):
+    """
+    A cue ends after max_words words, at sentence punctuation, when it would
+    last longer than max_seconds, or at a pause longer than max_pause.
+    Returns [(start, end, text)].
+    """
+    cues = []
+    current = []
+    for word, start, end in words:
+        if current and (
+            start - current[-1][2] > max_pause or end - current[0][1] > max_seconds
+        ):
+            cues.append((current[0][1], current[-1][2], " ".join(w for w, _, _ in current)))
+            current = []
+        current.append((word, start, end))
+        if len(current) >= max_words or SENTENCE_END.search(word):
+            cues.append((current[0][1], current[-1][2], " ".join(w for w, _, _ in current)))
+            current = []
+    if current:
+        cues.append((current[0][1], current[-1][2], " ".join(w for w, _, _ in current)))
+    return cues
+
+
+# ✅ Function: Cues that cover the whole segment (for burned-in captions)
+def fill_gaps(cues, duration):
+    """
+    Each caption stays until the next one starts, the first one from 0 and the
+    last one until duration, so the caption box never flickers empty.
+    """
+    if not cues:
+        return []
+    filled = []
+    for i, (start, end, text) in enumerate(cues):
+        start = 0.0 if i == 0 else start
+        end = cues[i + 1][0] if i + 1 < len(cues) else max(duration, end)
+        filled.append((start, max(end, start), text))
+    return filled
+
+
+def _timestamp(seconds, separator):
+    millis = int(round(max(seconds, 0.0) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+# ✅ Function: Cues -> SRT text
+def to_srt(cues):
+    blocks = []
+    for i, (start, end, text) in enumerate(cues, start=1):
+        blocks.append(f"{i}\n{_timestamp(start, ',')} --> {_timestamp(end, ',')}\n{text}\n")
+    return "\n".join(blocks)
+
+
+# ✅ Function: Cues -> WebVTT text
+def to_webvtt(cues):
+    blocks = ["WEBVTT\n"]
+    for start, end, text in cues:
+        blocks.append(f"{_timestamp(start, '.')} --> {_timestamp(end, '.')}\n{text}\n")
+    return "\n".join(blocks)
+
+
+# ✅ Function: Write cues as .srt or .vtt (chosen by extension)
+def write_captions(cues, output_file):
+    content = to_webvtt(cues) if output_file.lower().endswith(".vtt") else to_srt(cues)
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(content)
+    return output_file
+
+
+# ✅ Function: Shift per-segment cues onto one lecture timeline
+def concatenate_cues(segment_cues, durations):
+    cues = []
+    offset = 0.0
+    for segment, duration in zip(segment_cues, durations):
+        cues += [(offset + start, offset + end, text) for start, end, text in segment]
+        offset += duration
+    return cues
@@ -0,0 +1,145 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+
+from langchain_core.embeddings import Embeddings
+
+
+# ✅ Class: Persistent embedding cache in front of any LangChain Embeddings
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings object and stores every vector in a SQLite file.
+
+    Vectors are keyed by model name + text hash, so the same chunk or query is
+    only sent to the embedding API once. When the file grows past max_bytes the
+    least recently used vectors are evicted.
+    """
+
+    def __init__(self, embeddings, cache_path, model_name=None, max_bytes=512 * 1024 * 1024):
+        self.embeddings = embeddings
+        self.cache_path = cache_path
+        self.model_name = model_name or getattr(embeddings, "model", type(embeddings).__name__)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(cache_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._db = sqlite3.connect(cache_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)"
+        )
+        self._db.commit()
+
+    # Keep the wrapped object's attributes reachable (e.g. embeddings.dimension)
+    def __getattr__(self, name):
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def _key(self, text, kind):
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{kind}:{digest}"
+
+    def _lookup(self, keys):
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                marks = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+
+            if found:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._db.commit()
+        return found
+
+    def _store(self, items):
+        now = time.time()
+        rows = []
+        for key, vector in items:
+            blob = array("f", vector).tobytes()
+            rows.append((key, blob, len(blob), now))
+
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_used)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+            self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop the least recently used vectors until we are back under budget
+        to_free = total - self.max_bytes
+        freed = 0
+        doomed = []
+        for key, size in self._db.execute(
+            "SELECT key, size FROM embeddings ORDER BY last_used ASC"
+        ):
+            doomed.append((key,))
+            freed += size
+            if freed >= to_free:
+                break
+        self._db.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        self._db.commit()
+
+    def _embed_cached(self, texts, kind, embed_fn):
+        keys = [self._key(text, kind) for text in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+
+        # Embed each missing text only once, even if it appears several times
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            vectors = embed_fn(list(missing.values()))
+            fresh = list(zip(missing.keys(), vectors))
+            self._store(fresh)
+            found.update(fresh)
+
+        return [list(found[key]) for key in keys]
+
+    def embed_documents(self, texts):
+        return self._embed_cached(list(texts), "doc", self.embeddings.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed_cached(
+            [text], "query", lambda batch: [self.embeddings.embed_query(batch[0])]
+        )[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
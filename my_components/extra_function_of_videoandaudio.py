@@ -1,68 +1,76 @@
 import json
 import re
-from moviepy.editor import *
-from gtts import gTTS
 import os
 import math
 import numpy as np
 import time
+from slide_json_parser import clean_and_parse_json
+from tts_scheduler import synthesize_many, synthesize_gtts, mp3_duration
+from tts_cache import TTSCache, cached_synthesizer
+from audio_buffer import AudioBuffer, audio_duration
+from video_encoder import encode_stills, encode_still_frames
+from segment_render import render_segments
+from render_manifest import RenderManifest, DEFAULT_SEGMENT_CACHE_DIR, DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_BYTES
+from lecture_packaging import package_lecture
+from caption_alignment import align_words, group_captions, fill_gaps, concatenate_cues, write_captions
+from audio_buffer import concatenate_buffers
 
-# ✅ Function: Create SRT file
-def create_srt_file(transcripts, slide_info, audio_files, output_file="captions.srt"):
-    """Create SRT subtitle file with word chunks"""
-    srt_content = []
-    subtitle_index = 1
-    current_time = 0
-    
-    for i, (transcript, info, audio_file) in enumerate(zip(transcripts, slide_info, audio_files)):
-        try:
-            audio_clip = AudioFileClip(audio_file)
-            duration = audio_clip.duration
-            audio_clip.close()
-        except:
-            duration = 5  # fallback duration
-        
-        # Split transcript into chunks of 5-6 words
-        words = transcript.split()
-        chunk_size = 6
-        word_chunks = [words[i:i + chunk_size] for i in range(0, len(words), chunk_size)]
-        
-        if not word_chunks:
-            continue
-            
-        chunk_duration = duration / len(word_chunks)
-        
-        for chunk in word_chunks:
-            chunk_text = " ".join(chunk)
-            start_time = current_time
-            end_time = current_time + chunk_duration
-            
-            # Convert to SRT time format
-            def seconds_to_srt_time(seconds):
-                hours = int(seconds // 3600)
-                minutes = int((seconds % 3600) // 60)
-                secs = int(seconds % 60)
-                millis = int((seconds % 1) * 1000)
-                return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
-            
-            start_srt = seconds_to_srt_time(start_time)
-            end_srt = seconds_to_srt_time(end_time)
-            
-            srt_content.append(f"{subtitle_index}")
-            srt_content.append(f"{start_srt} --> {end_srt}")
-            srt_content.append(chunk_text)
-            srt_content.append("")  # Empty line
-            
-            subtitle_index += 1
-            current_time = end_time
-        
-        current_time = current_time  # Continue from where we left off
-    
-    # Write SRT file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(srt_content))
+# ✅ Function: gTTS through a TTS cache (headings whose text did not change are not synthesized again)
+def gtts_synthesizer(cache):
+    return cached_synthesizer(synthesize_gtts, cache, "gtts", "default", "normal", "en", "mp3", mp3_duration)
+
+
+tts_cache = TTSCache()
+gtts_synthesize = gtts_synthesizer(tts_cache)
+# Static slide layouts and caption overlays are drawn once and reused across frames
+_slide_renderer = None
+
+
+def get_slide_renderer():
+    # Pillow is loaded only when the first frame is drawn
+    global _slide_renderer
+    if _slide_renderer is None:
+        from slide_renderer import SlideRenderer
+
+        _slide_renderer = SlideRenderer()
+    return _slide_renderer
+
+
+# ✅ Function: Word-aligned caption cues for every heading (computed once)
+def caption_timeline(transcripts, audio_files):
+    """
+    Returns (segment_cues, durations): per heading, [(start, end, text)]
+    relative to that heading's audio, from energy-based word alignment of the
+    narration. Feeds both the SRT/WebVTT files and the burned-in captions.
+    """
+    segment_cues = []
+    durations = []
+    for transcript, audio_file in zip(transcripts, audio_files):
+        audio = audio_file
+        if not isinstance(audio, AudioBuffer):
+            try:
+                with open(audio_file, "rb") as f:
+                    audio = AudioBuffer.from_mp3_bytes(f.read(), label=audio_file)
+            except Exception as e:
+                print(f"⚠️ Could not read {audio_file} for caption timing ({e}), using even spacing")
+                duration = audio_duration(audio_file, fallback=5)
+                segment_cues.append(caption_chunks(transcript, duration))
+                durations.append(duration)
+                continue
+
+        words = align_words(transcript.split(), audio.samples, audio.sample_rate)
+        segment_cues.append(group_captions(words))
+        durations.append(audio.duration)
+    return segment_cues, durations
+
+
+# ✅ Function: Create SRT (or WebVTT, for a .vtt output_file) captions
+def create_srt_file(transcripts, slide_info, audio_files, output_file="captions.srt", timeline=None):
+    """Create subtitle file with word-aligned caption chunks"""
+    segment_cues, durations = timeline or caption_timeline(transcripts, audio_files)
+    write_captions(concatenate_cues(segment_cues, durations), output_file)
     
-    print(f"✅ SRT file created: {output_file}")
+    print(f"✅ Captions file created: {output_file}")
     return output_file
 
 # ✅ Function: Save to text file
@@ -75,33 +83,33 @@ def save_to_simple_text(filename):
         print(f"❌ File {filename} not found!")
         return ""
 
-# ✅ Function: Extract JSON safely
-def clean_and_parse_json(text_output):
-    """Extracts valid JSON from LLM output and parses it safely."""
-    print("\n🔍 Raw text preview:", text_output[:500])
-    
-    json_match = re.search(r"\{.*\}", text_output, re.DOTALL)
-    if not json_match:
-        print("❌ No JSON object found in text. Returning None.")
-        return None
-    
-    json_str = json_match.group(0)
-    
-    try:
-        slides = json.loads(json_str)
-        print("✅ JSON parsed successfully")
-        return slides
-    except json.JSONDecodeError as e:
-        print("❌ JSON parsing failed:", e)
-        return None
-
-# ✅ FIXED Function: Generate separate audio for each heading
-def generate_audio_from_slides(slides_json):
-    """Generate separate audio files for each heading with their content"""
+# ✅ Function: Safe, unique-per-heading audio filename
+def heading_audio_filename(slide_idx, heading_idx, heading, suffix="", synthesize=None, transcript=None):
+    # Cached synthesizers name the file after the content (cache key), so a
+    # re-run never mixes up audio of headings that moved
+    key = getattr(synthesize, "key", None)
+    if key is not None and transcript is not None:
+        return f"{key(transcript)}.mp3"
+    audio_filename = f"slide_{slide_idx}_heading_{heading_idx+1}_{heading.replace(' ', '_').replace('/', '_').replace('?', '').replace('!', '')}{suffix}.mp3"
+    # Clean filename more thoroughly
+    return re.sub(r'[^\w\-_\.]', '_', audio_filename)
+
+
+# ✅ FIXED Function: Generate separate audio for each heading (headings synthesized in parallel)
+def generate_audio_from_slides(slides_json, max_workers=4, in_memory=True, synthesize=None):
+    """Generate separate audio for each heading with their content.
+
+    With in_memory=True each heading's audio is returned as an AudioBuffer
+    (MP3 decoded once, nothing written to disk); otherwise as an .mp3 path.
+    synthesize defaults to gTTS with the module's cache (see gtts_synthesizer).
+    """
+    synthesize = synthesize or gtts_synthesize
     all_audio_files = []
     all_transcripts = []
     all_slide_info = []
-    
+
+    # Collect every heading first so they can be synthesized concurrently
+    jobs = []
     for slide_idx, (slide_name, slide_content) in enumerate(slides_json.items(), start=1):
         print(f"🎤 Processing slide {slide_idx}: {slide_name}")
         
@@ -110,13 +118,7 @@ def generate_audio_from_slides(slides_json):
             print(f"⏭️ Skipping {slide_name} (not a slide dictionary)")
             continue
         
-        slide_audio_files = []
-        slide_transcripts = []
-        slide_heading_info = []
-        
         for heading_idx, (heading, content) in enumerate(slide_content.items()):
-            print(f"  📝 Creating audio for heading: {heading}")
-            
             # Create transcript for this specific heading
             transcript_parts = [heading]
             
@@ -126,127 +128,268 @@ def generate_audio_from_slides(slides_json):
             elif isinstance(content, str):
                 transcript_parts.append(content)
             
-            heading_transcript = ". ".join(transcript_parts)
-            
-            try:
-                # Generate TTS audio for this heading with FIXED SETTINGS
-                tts = gTTS(text=heading_transcript, lang="en", slow=False)
-                audio_filename = f"slide_{slide_idx}_heading_{heading_idx+1}_{heading.replace(' ', '_').replace('/', '_').replace('?', '').replace('!', '')}.mp3"
-                
-                # Clean filename more thoroughly
-                audio_filename = re.sub(r'[^\w\-_\.]', '_', audio_filename)
-                
-                tts.save(audio_filename)
-                
-                # ✅ IMPORTANT: Add small delay to ensure file is saved properly
-                time.sleep(0.5)
-                
-                # ✅ Verify audio file exists and has content
-                if os.path.exists(audio_filename) and os.path.getsize(audio_filename) > 1000:  # At least 1KB
-                    try:
-                        # Test load the audio to make sure it's valid
-                        test_audio = AudioFileClip(audio_filename)
-                        test_duration = test_audio.duration
-                        test_audio.close()
-                        
-                        if test_duration > 0:
-                            slide_audio_files.append(audio_filename)
-                            slide_transcripts.append(heading_transcript)
-                            slide_heading_info.append({
-                                "slide_name": slide_name,
-                                "heading": heading,
-                                "heading_index": heading_idx,
-                            })
-                            print(f"    ✅ Audio saved and verified: {audio_filename} ({test_duration:.2f}s)")
-                        else:
-                            raise Exception("Zero duration audio")
-                            
-                    except Exception as verify_error:
-                        print(f"    ❌ Audio verification failed for {audio_filename}: {verify_error}")
-                        raise verify_error
-                else:
-                    raise Exception(f"Audio file not created or too small: {audio_filename}")
-                
-            except Exception as e:
-                print(f"    ❌ Failed to generate audio for {heading}: {e}")
-                print(f"    🔄 Creating fallback audio...")
-                
-                # Create fallback audio with simple text
-                try:
-                    fallback_text = heading  # Just use heading text
-                    fallback_tts = gTTS(text=fallback_text, lang="en", slow=False)
-                    fallback_filename = f"slide_{slide_idx}_heading_{heading_idx+1}_fallback.mp3"
-                    fallback_filename = re.sub(r'[^\w\-_\.]', '_', fallback_filename)
-                    
-                    fallback_tts.save(fallback_filename)
-                    time.sleep(0.5)
-                    
-                    slide_audio_files.append(fallback_filename)
-                    slide_transcripts.append(fallback_text)
-                    slide_heading_info.append({
-                        "slide_name": slide_name,
-                        "heading": heading,
-                        "heading_index": heading_idx,
-                    })
-                    print(f"    ✅ Fallback audio created: {fallback_filename}")
-                    
-                except Exception as fallback_error:
-                    print(f"    ❌ Could not create fallback audio: {fallback_error}")
-        
-        all_audio_files.extend(slide_audio_files)
-        all_transcripts.extend(slide_transcripts)
-        all_slide_info.extend(slide_heading_info)
+            jobs.append({
+                "slide_idx": slide_idx,
+                "heading_idx": heading_idx,
+                "heading": heading,
+                "transcript": ". ".join(transcript_parts),
+                "info": {
+                    "slide_name": slide_name,
+                    "heading": heading,
+                    "heading_index": heading_idx,
+                },
+            })
+
+    print(f"🎵 Synthesizing {len(jobs)} headings with {max_workers} workers...")
+    results = synthesize_many(
+        [job["transcript"] for job in jobs], synthesize=synthesize, max_workers=max_workers
+    )
+
+    # ✅ Results come back in heading order, so output order stays deterministic
+    for job, result in zip(jobs, results):
+        heading = job["heading"]
+        transcript = job["transcript"]
+        audio_filename = heading_audio_filename(
+            job["slide_idx"], job["heading_idx"], heading, synthesize=synthesize, transcript=transcript
+        )
+
+        if result["error"] is not None:
+            print(f"    ❌ Failed to generate audio for {heading}: {result['error']}")
+            print(f"    🔄 Creating fallback audio...")
+
+            # Create fallback audio with simple text
+            transcript = heading  # Just use heading text
+            audio_filename = heading_audio_filename(
+                job["slide_idx"], job["heading_idx"], "", "fallback", synthesize=synthesize, transcript=transcript
+            )
+            result = synthesize_many(
+                [transcript], synthesize=synthesize, max_workers=1, min_bytes=1
+            )[0]
+            if result["error"] is not None:
+                print(f"    ❌ Could not create fallback audio: {result['error']}")
+                continue
+
+        if in_memory:
+            # Same loudness for every heading, without the dead air gTTS leaves at the ends
+            audio = AudioBuffer.from_mp3_bytes(result["audio"], label=audio_filename).normalized()
+            print(f"    ✅ Audio decoded and verified: {audio}")
+        else:
+            with open(audio_filename, "wb") as f:
+                f.write(result["audio"])
+            audio = audio_filename
+            print(f"    ✅ Audio saved and verified: {audio_filename} ({result['duration']:.2f}s)")
+
+        all_audio_files.append(audio)
+        all_transcripts.append(transcript)
+        all_slide_info.append(job["info"])
     
     return all_audio_files, all_transcripts, all_slide_info
 
+# ✅ Function: Split a transcript into timed 6-word caption chunks
+def caption_chunks(transcript, duration, chunk_size=6):
+    words = transcript.split()
+    word_chunks = [words[i:i + chunk_size] for i in range(0, len(words), chunk_size)]
+    
+    if not word_chunks:
+        word_chunks = [["No content available"]]
+    
+    chunk_duration = duration / len(word_chunks)
+    return [
+        (chunk_idx * chunk_duration, (chunk_idx + 1) * chunk_duration, " ".join(chunk))
+        for chunk_idx, chunk in enumerate(word_chunks)
+    ]
+
+
+# ✅ Function: Render every heading segment in its own process, then stream-copy join
+def render_video_in_segments(
+    slides_json,
+    audio_files,
+    transcripts,
+    slide_info,
+    output_file="video.mp4",
+    workers=None,
+    preset="veryfast",
+    segment_cache_dir=DEFAULT_SEGMENT_CACHE_DIR,
+    timeline=None,
+    cache_max_age_days=DEFAULT_MAX_AGE_DAYS,
+    cache_max_bytes=DEFAULT_MAX_BYTES,
+):
+    """Same video as create_slides_video_with_audio, built from one file per heading.
+
+    Segments are encoded in parallel (one per CPU core by default) and joined
+    with the ffmpeg concat demuxer without re-encoding; no segment is kept in
+    memory after it has been written. Encoded segments are kept in
+    segment_cache_dir (None disables it), so after an edit only the headings
+    whose layout, transcript, audio or settings changed are rendered again.
+    After each render the cache is pruned to cache_max_age_days / cache_max_bytes.
+    Returns [(info, duration)] of the rendered headings (chapters are built
+    from these, not from slide_info), or False when nothing was rendered.
+    """
+    segment_cues = (timeline or caption_timeline(transcripts, audio_files))[0]
+    jobs = []
+    rendered = []  # (slide_info entry, duration) of each segment in the video
+    for audio_file, transcript, info, cues in zip(audio_files, transcripts, slide_info, segment_cues):
+        slide_content = slides_json[info["slide_name"]]
+        if not isinstance(slide_content, dict):
+            print(f"⏭️ Skipping segment for {info['slide_name']} (not a dictionary)")
+            continue
+        if not isinstance(audio_file, AudioBuffer) and not os.path.exists(audio_file):
+            print(f"❌ Audio file not found: {audio_file}")
+            continue
+
+        duration = audio_duration(audio_file, fallback=0)
+        if duration <= 0:
+            print(f"⚠️ Invalid audio duration for {info['heading']}: {duration}")
+            continue
+
+        jobs.append({
+            "title": info["slide_name"],
+            "headings": list(slide_content.keys()),
+            "highlight_index": info["heading_index"],
+            "captions": fill_gaps(cues, duration) or caption_chunks(transcript, duration),
+            "audio": audio_file,
+            "fps": 24,
+            "preset": preset,
+        })
+        rendered.append((info, duration))
+
+    if not jobs:
+        print("❌ No video segments generated.")
+        return False
+
+    os.makedirs(os.path.dirname(output_file) if os.path.dirname(output_file) else '.', exist_ok=True)
+    try:
+        manifest = RenderManifest(segment_cache_dir) if segment_cache_dir else None
+        render_segments(jobs, output_file, workers=workers, manifest=manifest)
+    except Exception as video_error:
+        print(f"❌ Error creating final video: {video_error}")
+        return False
+    if manifest is not None:
+        manifest.prune(cache_max_age_days, cache_max_bytes)
+    print(f"🎬 Video saved successfully: {output_file}")
+    return rendered
+
+
+# ✅ Function: One still frame per caption, generated lazily
+def iter_slide_stills(segment_stills):
+    for title, headings, highlight_index, captions in segment_stills:
+        for start, end, text in captions:
+            yield get_slide_renderer().frame(title, headings, highlight_index, text), end - start
+
+
+# ✅ Function: Write the narration of all segments as a single WAV file
+def write_audio_track(segment_audio, path):
+    # Plain NumPy concatenation of the decoded narration
+    return concatenate_buffers(segment_audio).write_wav(path)
+
+
 # ✅ FIXED Function: Create video with proper audio handling
-def create_slides_video_with_audio(slides_json, audio_files, transcripts, slide_info, output_file="video.mp4"):
-    """Create a video with dynamic highlighting per heading and chunked captions"""
+def create_slides_video_with_audio(
+    slides_json,
+    audio_files,
+    transcripts,
+    slide_info,
+    output_file="video.mp4",
+    encoder="stills",
+    preset="veryfast",
+    threads=0,
+    timeline=None,
+):
+    """Create a video with dynamic highlighting per heading and chunked captions
+
+    encoder: "stills" (one image per caption + audio track via the ffmpeg
+    concat demuxer), "pipe" (the same stills streamed to ffmpeg as raw
+    frames), "moviepy" (write_videofile) or "segments" (render_video_in_segments).
+    Only "moviepy" builds MoviePy clips; the ffmpeg encoders work from the
+    rendered stills and one decoded WAV track.
+    preset/threads are the x264 options for the ffmpeg encoders.
+    timeline is caption_timeline()'s result (computed here if not given).
+    Returns [(info, duration)] of the headings in the video, or False.
+    """
+    if encoder == "segments":
+        return render_video_in_segments(
+            slides_json, audio_files, transcripts, slide_info, output_file, preset=preset, timeline=timeline
+        )
+    use_moviepy = encoder == "moviepy"
+    if use_moviepy:
+        from moviepy.editor import AudioFileClip, concatenate_videoclips
+
+    segment_cues = (timeline or caption_timeline(transcripts, audio_files))[0]
+
     video_segments = []
+    segment_audio = []  # Decoded audio of each created segment, in order (ffmpeg encoders)
+    segment_stills = []  # (title, headings, highlight index, captions) per segment
     audio_clips_to_close = []  # Keep track of audio clips for cleanup
+    rendered = []  # (slide_info entry, duration) of each segment in the video
     
     for i, (audio_file, transcript, info) in enumerate(zip(audio_files, transcripts, slide_info)):
         print(f"🎬 Creating segment {i+1}: {info['slide_name']} - {info['heading']}")
         
-        # ✅ Load and verify audio properly with error handling
-        try:
-            # Verify file exists first
+        # ✅ ffmpeg encoders decode file audio once, like in-memory narration
+        if not use_moviepy and not isinstance(audio_file, AudioBuffer):
             if not os.path.exists(audio_file):
                 print(f"❌ Audio file not found: {audio_file}")
                 continue
-                
-            # Load audio for this heading
-            audio_clip = AudioFileClip(audio_file)
-            duration = audio_clip.duration
-            
-            # Verify audio has valid duration
+            try:
+                audio_file = AudioBuffer.from_file(audio_file)
+            except Exception as e:
+                print(f"❌ Error loading audio {audio_file}: {e}")
+                continue
+
+        # ✅ In-memory audio: duration and silence check come straight from the samples
+        if isinstance(audio_file, AudioBuffer):
+            duration = audio_file.duration
             if duration <= 0:
                 print(f"⚠️ Invalid audio duration: {duration}")
-                audio_clip.close()
                 continue
-                
-            # Keep track of audio clip for later cleanup
-            audio_clips_to_close.append(audio_clip)
-                
-            print(f"    🔊 Audio loaded successfully: {duration:.2f}s from {audio_file}")
-            
-            # ✅ Test audio data
+            if audio_file.peak == 0:
+                print(f"    ⚠️ Audio appears to be silent, but proceeding...")
+            else:
+                print(f"    🎵 Audio has sound data (max amplitude: {audio_file.peak:.3f})")
+            if use_moviepy:
+                audio_clip = audio_file.to_audio_clip()
+                audio_clips_to_close.append(audio_clip)
+
+        # ✅ Load and verify audio properly with error handling
+        else:
             try:
-                # Sample a small portion to check if audio has data
-                sample_audio = audio_clip.subclip(0, min(1.0, duration))
-                audio_array = sample_audio.to_soundarray()
-                sample_audio.close()
-                
-                if audio_array.max() == 0:
-                    print(f"    ⚠️ Audio appears to be silent, but proceeding...")
-                else:
-                    print(f"    🎵 Audio has sound data (max amplitude: {audio_array.max():.3f})")
-            except Exception as test_error:
-                print(f"    ⚠️ Could not test audio data ({test_error}), but proceeding...")
-                
-        except Exception as e:
-            print(f"❌ Error loading audio {audio_file}: {e}")
-            continue
+                # Verify file exists first
+                if not os.path.exists(audio_file):
+                    print(f"❌ Audio file not found: {audio_file}")
+                    continue
+
+                # Load audio for this heading
+                audio_clip = AudioFileClip(audio_file)
+                duration = audio_clip.duration
+
+                # Verify audio has valid duration
+                if duration <= 0:
+                    print(f"⚠️ Invalid audio duration: {duration}")
+                    audio_clip.close()
+                    continue
+
+                # Keep track of audio clip for later cleanup
+                audio_clips_to_close.append(audio_clip)
+
+                print(f"    🔊 Audio loaded successfully: {duration:.2f}s from {audio_file}")
+
+                # ✅ Test audio data
+                try:
+                    # Sample a small portion to check if audio has data
+                    sample_audio = audio_clip.subclip(0, min(1.0, duration))
+                    audio_array = sample_audio.to_soundarray()
+                    sample_audio.close()
+
+                    if audio_array.max() == 0:
+                        print(f"    ⚠️ Audio appears to be silent, but proceeding...")
+                    else:
+                        print(f"    🎵 Audio has sound data (max amplitude: {audio_array.max():.3f})")
+                except Exception as test_error:
+                    print(f"    ⚠️ Could not test audio data ({test_error}), but proceeding...")
+
+            except Exception as e:
+                print(f"❌ Error loading audio {audio_file}: {e}")
+                continue
         
         # Get slide content for highlighting
         slide_content = slides_json[info["slide_name"]]
@@ -256,89 +399,22 @@ def create_slides_video_with_audio(slides_json, audio_files, transcripts, slide_
         
         headings = list(slide_content.keys())
         
-        # Create text clips with color highlighting
-        text_clips = []
-        y_position = 50
-        
-        # Add slide title
-        title_clip = (
-            TextClip(
-                info["slide_name"],
-                fontsize=40,
-                color="white",
-                font="Arial-Bold",
-            )
-            .set_position(("center", y_position))
-            .set_duration(duration)
-        )
-        text_clips.append(title_clip)
-        y_position += 80
-        
-        # Add headings with color highlighting
-        for idx, heading in enumerate(headings):
-            if idx == info["heading_index"]:
-                # Current heading - Yellow color (highlighted)
-                heading_color = "yellow"
-                heading_fontsize = 36
-            else:
-                # Other headings - White color
-                heading_color = "lightgray"
-                heading_fontsize = 32
-            
-            heading_clip = (
-                TextClip(
-                    heading,
-                    fontsize=heading_fontsize,
-                    color=heading_color,
-                    font="Arial-Bold" if idx == info["heading_index"] else "Arial",
-                )
-                .set_position(("center", y_position))
-                .set_duration(duration)
-            )
-            text_clips.append(heading_clip)
-            y_position += 60
-        
-        # Create chunked captions (5-6 words at a time)
-        words = transcript.split()
-        chunk_size = 6
-        word_chunks = [words[i:i + chunk_size] for i in range(0, len(words), chunk_size)]
-        
-        if not word_chunks:
-            word_chunks = [["No content available"]]
-        
-        chunk_duration = duration / len(word_chunks)
-        caption_clips = []
-        
-        for chunk_idx, chunk in enumerate(word_chunks):
-            chunk_text = " ".join(chunk)
-            start_time = chunk_idx * chunk_duration
-            end_time = (chunk_idx + 1) * chunk_duration
-            
-            chunk_clip = (
-                TextClip(
-                    chunk_text,
-                    fontsize=28,
-                    color="yellow",
-                    size=(1100, 150),
-                    method="caption",
-                    align="center",
-                    font="Arial-Bold",
-                )
-                .set_position(("center", 550))
-                .set_start(start_time)
-                .set_duration(chunk_duration)
-            )
-            caption_clips.append(chunk_clip)
-        
-        # Create background and combine all clips
-        bg_clip = ColorClip(size=(1280, 720), color=(20, 20, 40)).set_duration(duration)
-        border_clip = ColorClip(size=(1260, 700), color=(40, 40, 60)).set_position((10, 10)).set_duration(duration)
-        
-        all_clips = [bg_clip, border_clip] + text_clips + caption_clips
+        # Word-aligned captions, held on screen until the next one starts
+        captions = fill_gaps(segment_cues[i], duration) or caption_chunks(transcript, duration)
+
+        if not use_moviepy:
+            # ✅ Stills and audio are all the ffmpeg encoders need
+            segment_audio.append(audio_file)
+            segment_stills.append((info["slide_name"], headings, info["heading_index"], captions))
+            rendered.append((info, duration))
+            print(f"✅ Created segment for: {info['heading']}")
+            continue
         
-        # ✅ CRITICAL FIX: Properly set audio to the composite
+        # ✅ Slide layout is rasterized once per highlighted heading; frames only blend the caption box
         try:
-            segment = CompositeVideoClip(all_clips, size=(1280, 720))
+            segment = get_slide_renderer().segment_clip(
+                info["slide_name"], headings, info["heading_index"], captions, duration
+            )
             
             # ✅ Set audio with proper error handling
             segment = segment.set_audio(audio_clip)
@@ -351,57 +427,83 @@ def create_slides_video_with_audio(slides_json, audio_files, transcripts, slide_
                 print(f"    ⚠️ Warning: Segment audio is None")
             
             video_segments.append(segment)
+            rendered.append((info, duration))
             print(f"✅ Created segment for: {info['heading']}")
             
         except Exception as segment_error:
             print(f"❌ Error creating video segment: {segment_error}")
             continue
     
-    # Combine all segments
-    if video_segments:
-        print(f"🎬 Combining {len(video_segments)} video segments...")
-        
+    if not video_segments and not segment_stills:
+        print("❌ No video segments generated.")
+        return False
+
+    # Create output directory if it doesn't exist
+    os.makedirs(os.path.dirname(output_file) if os.path.dirname(output_file) else '.', exist_ok=True)
+
+    if not use_moviepy:
+        # ✅ ffmpeg encodes directly; the narration goes in as one WAV track
+        audio_track = f"{os.path.splitext(output_file)[0]}_track.wav"
         try:
-            final_clip = concatenate_videoclips(video_segments)
-            
-            # ✅ Verify final clip has audio
-            if final_clip.audio is not None:
-                print("✅ Final video has audio track")
-                try:
-                    total_duration = final_clip.duration
-                    audio_duration = final_clip.audio.duration
-                    print(f"📊 Video duration: {total_duration:.2f}s, Audio duration: {audio_duration:.2f}s")
-                except:
-                    print("📊 Could not get duration info, but proceeding...")
+            write_audio_track(segment_audio, audio_track)
+            if encoder == "stills":
+                print(f"🖼️ Encoding {sum(len(s[3]) for s in segment_stills)} stills with ffmpeg ({preset})...")
+                encode_stills(
+                    iter_slide_stills(segment_stills), output_file, audio_track,
+                    fps=24, preset=preset, threads=threads,
+                )
             else:
-                print("⚠️ WARNING: Final video has no audio track!")
-            
-            # Create output directory if it doesn't exist
-            os.makedirs(os.path.dirname(output_file) if os.path.dirname(output_file) else '.', exist_ok=True)
-            
-            # ✅ Write video with explicit audio settings
-            final_clip.write_videofile(
-                output_file, 
-                fps=24, 
-                codec='libx264', 
-                audio_codec='aac',
-                verbose=True,
-                logger='bar'  # Show progress bar
-            )
-            
-            # Cleanup
-            final_clip.close()
-            for seg in video_segments:
-                seg.close()
-            
-            print(f"🎬 Video saved successfully: {output_file}")
-            
+                print(f"🚰 Piping frames to ffmpeg ({preset})...")
+                encode_still_frames(
+                    iter_slide_stills(segment_stills), output_file, get_slide_renderer().size, audio_track,
+                    fps=24, preset=preset, threads=threads,
+                )
         except Exception as video_error:
             print(f"❌ Error creating final video: {video_error}")
             return False
+        finally:
+            if os.path.exists(audio_track):
+                os.remove(audio_track)
+        print(f"🎬 Video saved successfully: {output_file}")
+        return rendered
+
+    # Combine all segments
+    print(f"🎬 Combining {len(video_segments)} video segments...")
     
-    else:
-        print("❌ No video segments generated.")
+    try:
+        final_clip = concatenate_videoclips(video_segments)
+        
+        # ✅ Verify final clip has audio
+        if final_clip.audio is not None:
+            print("✅ Final video has audio track")
+            try:
+                total_duration = final_clip.duration
+                audio_duration = final_clip.audio.duration
+                print(f"📊 Video duration: {total_duration:.2f}s, Audio duration: {audio_duration:.2f}s")
+            except:
+                print("📊 Could not get duration info, but proceeding...")
+        else:
+            print("⚠️ WARNING: Final video has no audio track!")
+        
+        # ✅ Write video with explicit audio settings
+        final_clip.write_videofile(
+            output_file, 
+            fps=24, 
+            codec='libx264', 
+            audio_codec='aac',
+            verbose=True,
+            logger='bar'  # Show progress bar
+        )
+        
+        # Cleanup
+        final_clip.close()
+        for seg in video_segments:
+            seg.close()
+        
+        print(f"🎬 Video saved successfully: {output_file}")
+        
+    except Exception as video_error:
+        print(f"❌ Error creating final video: {video_error}")
         return False
     
     # Cleanup audio clips
@@ -411,73 +513,91 @@ def create_slides_video_with_audio(slides_json, audio_files, transcripts, slide_
         except:
             pass
     
-    return True
+    return rendered
 
 # ------------------ MAIN FLOW ------------------ #
-# ✅ Step 1: Load text result
-text_output = save_to_simple_text("my_result.txt")
+# Guarded so worker processes (segment rendering) can import this module
+if __name__ == "__main__":
+    # ✅ Step 1: Load text result
+    text_output = save_to_simple_text("my_result.txt")
 
-if not text_output.strip():
-    print("❌ No content found in my_result.txt")
-    exit()
+    if not text_output.strip():
+        print("❌ No content found in my_result.txt")
+        exit()
 
-# ✅ Step 2: Parse into JSON
-slides_json = clean_and_parse_json(text_output)
+    # ✅ Step 2: Parse into JSON
+    slides_json = clean_and_parse_json(text_output)
 
-if not slides_json:
-    raise ValueError("❌ Could not parse slides JSON. Please check LLM output.")
+    if not slides_json:
+        raise ValueError("❌ Could not parse slides JSON. Please check LLM output.")
 
-print(f"✅ Parsed {len(slides_json)} slides from JSON")
+    print(f"✅ Parsed {len(slides_json)} slides from JSON")
 
-# ✅ Step 3: Generate separate audios for each heading
-print("🎵 Generating individual audio files for each heading...")
-audio_files, transcripts, slide_info = generate_audio_from_slides(slides_json)
+    # ✅ Step 3: Generate separate audios for each heading
+    print("🎵 Generating individual audio files for each heading...")
+    audio_files, transcripts, slide_info = generate_audio_from_slides(slides_json)
 
-print(f"✅ Generated {len(audio_files)} individual audio segments")
+    print(f"✅ Generated {len(audio_files)} individual audio segments")
 
-if len(audio_files) == 0:
-    print("❌ No audio files generated. Exiting...")
-    exit()
+    if len(audio_files) == 0:
+        print("❌ No audio files generated. Exiting...")
+        exit()
 
-# ✅ Display generated files for verification
-print("\n📁 Generated Audio Files:")
-for i, (audio_file, info) in enumerate(zip(audio_files, slide_info), 1):
-    file_size = os.path.getsize(audio_file) if os.path.exists(audio_file) else 0
-    print(f"  {i}. {audio_file} ({file_size} bytes) - {info['heading']}")
+    # ✅ Display generated files for verification
+    print("\n📁 Generated Audio Files:")
+    for i, (audio_file, info) in enumerate(zip(audio_files, slide_info), 1):
+        if isinstance(audio_file, AudioBuffer):
+            print(f"  {i}. {audio_file} - {info['heading']}")
+            continue
+        file_size = os.path.getsize(audio_file) if os.path.exists(audio_file) else 0
+        print(f"  {i}. {audio_file} ({file_size} bytes) - {info['heading']}")
 
-# ✅ Step 4: Create SRT file
-srt_file = create_srt_file(transcripts, slide_info, audio_files)
+    # ✅ Step 4: Align captions once; SRT, WebVTT and the video all use this timeline
+    timeline = caption_timeline(transcripts, audio_files)
+    srt_file = create_srt_file(transcripts, slide_info, audio_files, timeline=timeline)
+    create_srt_file(transcripts, slide_info, audio_files, "captions.vtt", timeline=timeline)
 
-# ✅ Step 5: Ask user for video name and generate final video
-path = r"../Video_lectures"
-if not os.path.exists(path):
-    os.makedirs(path)
-    print(f"📁 Created directory: {path}")
+    # ✅ Step 5: Ask user for video name and generate final video
+    path = r"../Video_lectures"
+    if not os.path.exists(path):
+        os.makedirs(path)
+        print(f"📁 Created directory: {path}")
 
-video_lect = input("Enter the video name (without extension): ")
+    video_lect = input("Enter the video name (without extension): ")
 
-# ✅ Create video with chunked captions
-print("🎬 Starting video creation...")
-success = create_slides_video_with_audio(
-    slides_json, audio_files, transcripts, slide_info, f"{path}/{video_lect}.mp4"
-)
+    # ✅ Create video with chunked captions
+    print("🎬 Starting video creation...")
+    rendered = create_slides_video_with_audio(
+        slides_json, audio_files, transcripts, slide_info, f"{path}/{video_lect}.mp4",
+        encoder="segments", timeline=timeline,
+    )
 
-if success:
-    print("🎉 Video creation completed successfully!")
-    print(f"📄 SRT file: {srt_file}")
-    print(f"🎬 Video file: {path}/{video_lect}.mp4")
-    
-    # ✅ Optional: Cleanup temporary audio files
-    cleanup_choice = input("Do you want to delete temporary audio files? (y/n): ")
-    if cleanup_choice.lower() == "y":
-        for audio_file in audio_files:
-            try:
-                os.remove(audio_file)
-                print(f"🗑️ Deleted: {audio_file}")
-            except Exception as e:
-                print(f"⚠️ Could not delete {audio_file}: {e}")
-else:
-    print("❌ Video creation failed. Please check the errors above.")
+    if rendered:
+        # ✅ Chapters per rendered heading, faststart MP4 and an HLS copy for streaming
+        packaged = package_lecture(
+            f"{path}/{video_lect}.mp4",
+            [info for info, _ in rendered],
+            [duration for _, duration in rendered],
+            title=video_lect,
+        )
+
+        print("🎉 Video creation completed successfully!")
+        print(f"📄 SRT file: {srt_file}")
+        print(f"🎬 Video file: {path}/{video_lect}.mp4")
+        print(f"📦 HLS playlist: {packaged['hls']}")
+
+        # ✅ Optional: Cleanup temporary audio files (in-memory audio left none behind)
+        temp_files = [a for a in audio_files if not isinstance(a, AudioBuffer)]
+        cleanup_choice = input("Do you want to delete temporary audio files? (y/n): ") if temp_files else "n"
+        if cleanup_choice.lower() == "y":
+            for audio_file in temp_files:
+                try:
+                    os.remove(audio_file)
+                    print(f"🗑️ Deleted: {audio_file}")
+                except Exception as e:
+                    print(f"⚠️ Could not delete {audio_file}: {e}")
+    else:
+        print("❌ Video creation failed. Please check the errors above.")
 
-print("\n📋 Required packages:")
-print("pip install moviepy gtts")
+    print("\n📋 Required packages:")
+    print("pip install moviepy gtts")
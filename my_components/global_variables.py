@@ -7,15 +7,50 @@ os.environ["GOOGLE_API_KEY"] = apis.gemini_key
 os.environ["PINECONE_API_KEY"] = apis.pinecone_Api_vector_db
 gemini_model_for_embaddings = "models/embedding-001"
 gemini_model_for_query = "gemini-2.5-pro"
+# Which chunks are already embedded in the index, per document
+ingestion_manifest_path = r"../my_documents/ingestion_manifest.json"
+# Local cache of embedding vectors (set to None to disable)
+embedding_cache_path = r"../my_documents/embedding_cache.sqlite"
+# Chunks per embedding/upsert request and how many requests run at once
+upsert_batch_size = 64
+upsert_workers = 4
+# "pinecone" (remote index) or "local" (offline NumPy store under local_vector_store_path)
+vector_store_backend = "pinecone"
+local_vector_store_path = r"../my_documents/vector_store"
+# LangChain Hub prompts are pulled once and kept here
+hub_prompt_cache_dir = r"../my_documents/prompt_cache"
+# Final LLM answers, reused while mode/prompt/instruction/model/chunks are unchanged
+response_cache_path = r"../my_documents/response_cache.sqlite"
+response_cache_ttl = 7 * 24 * 3600  # seconds
+response_cache_max_entries = 2000
+# Cosine similarity for near-duplicate instructions (None = exact matches only)
+response_cache_similarity = None
+# Kokoro narration: CPU threads for torch (None = torch default) and whether to
+# skip the IPython audio players (headless runs outside notebooks)
+kokoro_threads = None
+narration_headless = False
+# Content-addressed narration audio shared by the gTTS and Kokoro paths
+tts_cache_dir = r"../my_audios/tts_cache"
+tts_cache_max_bytes = 1024 * 1024 * 1024
+# Encoded heading segments reused between video renders
+segment_cache_dir = r"../video_lectures/segment_cache"
+# Narration post-processing: gated RMS loudness target (dBFS), silence threshold
+# for trimming, and crossfade between Kokoro chunks
+narration_target_db = -20.0
+narration_silence_db = -50.0
+narration_crossfade_ms = 30
 audio_clip = r"../my_audios/123456.wav"
-# ImageMagick  path
-change_settings(
-    {"IMAGEMAGICK_BINARY": r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"}
-)
 unique_id = uuid4()
 
 # AudioSegment.converter = r"C:\Users\user\Downloads\ffmpeg-7.1.1-essentials_build\bin\ffmpeg.exe"
 # AudioSegment.ffprobe = (
 #     r"C:\Users\user\Downloads\ffmpeg-7.1.1-essentials_build\bin\ffprobe.exe"
 # )
-print(file_path)
+# ImageMagick for MoviePy's TextClip, applied only when a TextClip video is rendered
+# (video_and_audio_function.py); set IMAGEMAGICK_BINARY to override, "" to keep MoviePy's default
+imagemagick_binary = os.environ.get(
+    "IMAGEMAGICK_BINARY", r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
+)
+# Notebook run only; the batch pipeline (lecture_pipeline.py) loads these settings silently
+if __name__ == "__main__":
+    print(file_path)
@@ -0,0 +1,142 @@
+"""
+Cold-import benchmark: every module is imported in a fresh interpreter and
+must stay under its time budget without pulling in any heavy dependency.
+
+    python import_benchmark.py              # all groups
+    python import_benchmark.py --repeat 10 --budget-scale 2
+
+Exits non-zero when a module is over budget or loads a heavy package, so it
+can gate CI or a deploy of the worker image.
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+COMPONENTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Packages that must only be imported by the function that needs them
+HEAVY = {
+    "torch",
+    "kokoro",
+    "moviepy",
+    "librosa",
+    "whisper",
+    "langchain",
+    "langchain_core",
+    "langchain_google_genai",
+    "langchain_pinecone",
+    "pinecone",
+    "google",
+    "gtts",
+    "fitz",
+    "pdfplumber",
+    "scipy",
+    "PIL",
+}
+
+# (group, budget in seconds, modules). Text/PDF workers only need the first
+# group, which is standard library only; the media helpers may load NumPy.
+GROUPS = [
+    (
+        "text/pdf",
+        0.10,
+        [
+            "pdf_extraction",
+            "slide_json_parser",
+            "page_index",
+            "ingestion_manifest",
+            "batch_ingest",
+            "llm_session",
+            "response_cache",
+            "tts_scheduler",
+            "tts_cache",
+            "lecture_pipeline",
+        ],
+    ),
+    (
+        "audio/video",
+        0.60,
+        [
+            "audio_postprocess",
+            "audio_buffer",
+            "caption_alignment",
+            "narration_engine",
+            "video_encoder",
+            "render_manifest",
+            "segment_render",
+            "lecture_packaging",
+            "extra_function_of_videoandaudio",
+        ],
+    ),
+]
+
+CHILD = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+heavy = sorted({{name.split(".")[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{"seconds": seconds, "heavy": heavy}}))
+"""
+
+
+# ✅ Function: Import one module in a fresh interpreter
+def cold_import(module):
+    """
+    Returns {"seconds": import time, "heavy": heavy packages it loaded}.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(module=module, heavy=sorted(HEAVY))],
+        cwd=COMPONENTS_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+# ✅ Function: Median cold-import time per module, checked against its group budget
+def run_benchmark(groups=GROUPS, repeat=5, budget_scale=1.0):
+    failures = []
+    for group, budget, modules in groups:
+        budget *= budget_scale
+        print(f"\n📦 {group} (budget {budget * 1000:.0f} ms)")
+        for module in modules:
+            try:
+                runs = [cold_import(module) for _ in range(repeat)]
+            except RuntimeError as e:
+                print(f"  ❌ {module}: {e}")
+                failures.append(module)
+                continue
+
+            seconds = statistics.median(run["seconds"] for run in runs)
+            heavy = sorted({name for run in runs for name in run["heavy"]})
+            ok = seconds <= budget and not heavy
+            note = f"  loads {', '.join(heavy)}" if heavy else ""
+            print(f"  {'✅' if ok else '❌'} {module:<34} {seconds * 1000:7.1f} ms{note}")
+            if not ok:
+                failures.append(module)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check cold import time of the helper modules.")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module (median is used)")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiply every budget (slow machines)")
+    options = parser.parse_args(argv)
+
+    failures = run_benchmark(repeat=options.repeat, budget_scale=options.budget_scale)
+    if failures:
+        print(f"\n❌ Over budget or importing heavy packages: {', '.join(failures)}")
+        return 1
+    print("\n✅ All modules import within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import hashlib
+from contextlib import contextmanager
+
+
+# ✅ Function: Stable ID for a chunk (same hash the index has always used)
+def chunk_id(chunk_text):
+    return hashlib.md5(chunk_text.encode()).hexdigest()
+
+
+# ✅ Function: Key that identifies one document inside one vector store/namespace
+def document_key(index_name, namespace, source, backend="pinecone", store_path=None):
+    """
+    Both backends share one manifest, so the local store is keyed by its
+    folder ("local-<hash>") instead of the Pinecone index name; switching
+    backend or store path then re-embeds instead of reusing foreign entries.
+    """
+    if backend == "local":
+        folder = os.path.abspath(store_path or "vector_store")
+        index_name = f"local-{hashlib.md5(folder.encode()).hexdigest()[:12]}"
+    return f"{index_name}/{namespace}/{os.path.normpath(source)}"
+
+
+# ✅ Function: Load manifest from disk
+def load_manifest(manifest_path):
+    """
+    Read the ingestion manifest. A missing or broken file means "nothing ingested yet".
+    """
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        print(f"⚠️ Manifest {manifest_path} is corrupted, starting from empty")
+        return {}
+
+
+# ✅ Function: Save manifest atomically
+def save_manifest(manifest, manifest_path):
+    folder = os.path.dirname(manifest_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+# ✅ Function: Exclusive access to a manifest file across threads and processes
+@contextmanager
+def manifest_lock(manifest_path, timeout=60.0, poll_interval=0.05):
+    """
+    Hold <manifest_path>.lock (created with O_EXCL) around a load/modify/save,
+    so concurrent runs merge their changes instead of the last writer winning.
+    A lock file older than timeout is left over from a crashed run and is taken over.
+    """
+    folder = os.path.dirname(manifest_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    lock_path = f"{manifest_path}.lock"
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > timeout:
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(poll_interval)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+
+# ✅ Function: Work out which chunks must be embedded and which vectors must go
+def diff_chunks(manifest, doc_key, chunk_ids):
+    """
+    Compare the chunk hashes of a document with what was ingested last time.
+
+    Returns (new_ids, stale_ids): new_ids still need embedding and upserting,
+    stale_ids are no longer produced by this document and are not used by any
+    other document in the same index/namespace, so they can be deleted.
+    """
+    previous = set(manifest.get(doc_key, {}).get("chunks", []))
+    current = set(chunk_ids)
+
+    new_ids = [cid for cid in dict.fromkeys(chunk_ids) if cid not in previous]
+
+    # Chunks shared with other documents in the same namespace must be kept
+    scope = _scope(doc_key)
+    still_used = set()
+    for other_key, entry in manifest.items():
+        if other_key != doc_key and _scope(other_key) == scope:
+            still_used.update(entry.get("chunks", []))
+
+    stale_ids = sorted(previous - current - still_used)
+    return new_ids, stale_ids
+
+
+# ✅ Function: Record what is now stored for a document
+def record_document(manifest, doc_key, chunk_ids, page_ranges=None):
+    """
+    page_ranges (optional) is a list of (page_start, page_end) parallel to
+    chunk_ids; it is kept as a local page index for exact page lookups.
+    """
+    entry = {"chunks": list(dict.fromkeys(chunk_ids))}
+    if page_ranges is not None:
+        entry["pages"] = {
+            cid: list(pages) for cid, pages in zip(chunk_ids, page_ranges)
+        }
+    manifest[doc_key] = entry
+    return manifest
+
+
+def _scope(doc_key):
+    # "<index>/<namespace>/<source>" -> "<index>/<namespace>"
+    index_name, namespace, _ = doc_key.split("/", 2)
+    return f"{index_name}/{namespace}"
@@ -0,0 +1,124 @@
+import os
+
+from video_encoder import ffmpeg_binary, x264_args, run_ffmpeg
+
+
+# ✅ Function: One chapter per heading, titled "<slide>: <heading>"
+def chapters_from_slide_info(slide_info, durations):
+    """
+    durations are the lengths of the rendered segments, in the order of
+    slide_info; pass only the headings that are actually in the video.
+    Returns [(start_seconds, end_seconds, title)].
+    """
+    chapters = []
+    position = 0.0
+    for info, duration in zip(slide_info, durations):
+        title = f"{info['slide_name']}: {info['heading']}"
+        chapters.append((position, position + duration, title))
+        position += duration
+    return chapters
+
+
+def _escape_metadata(value):
+    # ffmetadata needs '=', ';', '#', '\' and newlines escaped with a backslash
+    for ch in ("\\", "=", ";", "#", "\n"):
+        value = value.replace(ch, "\\" + ch)
+    return value
+
+
+# ✅ Function: Chapters in ffmpeg's FFMETADATA format
+def write_ffmetadata(chapters, output_file, title=None):
+    lines = [";FFMETADATA1"]
+    if title:
+        lines.append(f"title={_escape_metadata(title)}")
+    for start, end, chapter_title in chapters:
+        lines += [
+            "",
+            "[CHAPTER]",
+            "TIMEBASE=1/1000",
+            f"START={int(round(start * 1000))}",
+            f"END={int(round(end * 1000))}",
+            f"title={_escape_metadata(chapter_title)}",
+        ]
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return output_file
+
+
+# ✅ Function: MP4 with chapter markers and the moov atom at the front
+def package_mp4(input_file, output_file, chapters=None, title=None):
+    """
+    Streams are copied; only the container is rewritten. +faststart lets a
+    player start before the whole file has been downloaded.
+    """
+    args = [ffmpeg_binary(), "-y", "-loglevel", "error", "-i", input_file]
+    metadata_file = None
+    if chapters:
+        metadata_file = write_ffmetadata(chapters, f"{os.path.splitext(output_file)[0]}_chapters.txt", title)
+        args += ["-i", metadata_file, "-map", "0", "-map_metadata", "1", "-map_chapters", "1"]
+    args += ["-c", "copy", "-movflags", "+faststart", output_file]
+    try:
+        run_ffmpeg(args)
+    finally:
+        if metadata_file:
+            os.remove(metadata_file)
+    return output_file
+
+
+# ✅ Function: Cut points at every heading, plus every segment_seconds inside long headings
+def segment_boundaries(chapters, segment_seconds=6.0):
+    times = []
+    for start, end, _ in chapters:
+        t = start
+        while t < end - 0.5:  # no sliver segments at the end of a heading
+            times.append(round(t, 3))
+            t += segment_seconds
+    return sorted(set(times))[1:]  # the first segment starts at 0 anyway
+
+
+# ✅ Function: HLS playlist whose segments start at heading boundaries
+def package_hls(input_file, output_dir, chapters, segment_seconds=6.0, preset="veryfast"):
+    """
+    Writes <output_dir>/index.m3u8 and segment_00000.ts, ... Keyframes are
+    forced at every cut point so each segment is independently playable and
+    no segment spans two headings. Audio is copied, video re-encoded once.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cut_points = ",".join(f"{t:.3f}" for t in segment_boundaries(chapters, segment_seconds))
+
+    args = [ffmpeg_binary(), "-y", "-loglevel", "error", "-i", input_file]
+    args += x264_args(preset=preset) + ["-c:a", "copy", "-map", "0"]
+    if cut_points:
+        args += ["-force_key_frames", cut_points]
+    args += [
+        "-f", "segment",
+        "-segment_format", "mpegts",
+        "-segment_list", os.path.join(output_dir, "index.m3u8"),
+        "-segment_list_type", "m3u8",
+    ]
+    if cut_points:
+        args += ["-segment_times", cut_points]
+    args.append(os.path.join(output_dir, "segment_%05d.ts"))
+    run_ffmpeg(args)
+    return os.path.join(output_dir, "index.m3u8")
+
+
+# ✅ Function: Chapterized faststart MP4 (in place) plus an HLS copy of the lecture
+def package_lecture(video_file, slide_info, durations, title=None, hls=True, segment_seconds=6.0):
+    """
+    Returns {"mp4": path, "hls": playlist path or None}.
+    """
+    chapters = chapters_from_slide_info(slide_info, durations)
+    base = os.path.splitext(video_file)[0]
+
+    print(f"📑 Adding {len(chapters)} chapters and faststart to {video_file}...")
+    tmp_file = f"{base}_packaged.mp4"
+    package_mp4(video_file, tmp_file, chapters, title)
+    os.replace(tmp_file, video_file)
+
+    playlist = None
+    if hls:
+        print(f"📦 Writing HLS segments ({segment_seconds:g}s, cut at headings)...")
+        playlist = package_hls(video_file, f"{base}_hls", chapters, segment_seconds)
+        print(f"✅ HLS playlist: {playlist}")
+    return {"mp4": video_file, "hls": playlist}
@@ -0,0 +1,455 @@
+"""
+Unattended batch runner: PDF -> retrieval -> generation -> narration -> video
+for many lectures at once, without input() prompts.
+
+    python lecture_pipeline.py semester.json --output-dir ../video_lectures
+
+semester.json:
+    {
+      "defaults": {"outputs": ["pdf", "video"], "top_k": 18,
+                   "settings": {"vector_store_backend": "local"}},
+      "lectures": [
+        {"name": "week1", "pdf": "../my_documents/pp_week1.pdf",
+         "instructions": "Prepare the lecture on ...",
+         "outputs": ["pdf", "text", "audio", "video"]}
+      ]
+    }
+
+outputs: "pdf" (answer as PDF), "text" (slide JSON), "audio" (Kokoro
+narration per slide) and "video" (gTTS slide video with captions, chapters
+and HLS). "settings" overrides values from global_variables.py. Each lecture
+is a small DAG (extract -> ingest -> generate -> narrate / video)
+and every stage has its own concurrency limit across all lectures.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+COMPONENTS_DIR = os.path.dirname(os.path.abspath(__file__))
+# The notebook scripts, executed in order into one namespace per lecture (like main.ipynb)
+SCRIPTS = [
+    "global_variables.py",
+    "rag_model.py",
+    "llm_and_prompts.py",
+    "pdf_files.py",
+    "audio_and_text_cleaning.py",
+]
+OUTPUTS = ("pdf", "text", "audio", "video")
+DEFAULT_LIMITS = {"extract": 2, "ingest": 1, "generate": 4, "narrate": 1, "video": 1}
+
+
+# ✅ Function: The light part of main.ipynb's first cell; heavy names are added per stage
+def notebook_namespace():
+    from uuid import uuid4
+    from datetime import datetime
+
+    apis_dir = os.path.join(COMPONENTS_DIR, "..", "my_apis")
+    if apis_dir not in sys.path:
+        sys.path.append(apis_dir)
+    import apis
+
+    return {
+        "os": os,
+        "sys": sys,
+        "re": re,
+        "time": time,
+        "json": json,
+        "uuid4": uuid4,
+        "datetime": datetime,
+        "apis": apis,
+    }
+
+
+def _retrieval_names():
+    from langchain.text_splitter import CharacterTextSplitter
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from langchain_pinecone import PineconeVectorStore
+    from pinecone import Pinecone, ServerlessSpec
+
+    return {
+        "CharacterTextSplitter": CharacterTextSplitter,
+        "GoogleGenerativeAIEmbeddings": GoogleGenerativeAIEmbeddings,
+        "PineconeVectorStore": PineconeVectorStore,
+        "Pinecone": Pinecone,
+        "ServerlessSpec": ServerlessSpec,
+    }
+
+
+def _pdf_names():
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.pagesizes import A4
+
+    return {
+        "SimpleDocTemplate": SimpleDocTemplate,
+        "Paragraph": Paragraph,
+        "Spacer": Spacer,
+        "getSampleStyleSheet": getSampleStyleSheet,
+        "A4": A4,
+    }
+
+
+def _audio_names():
+    import numpy as np
+    from scipy.io import wavfile
+
+    return {"np": np, "wavfile": wavfile}
+
+
+# ✅ Class: One lecture from the manifest and everything produced for it
+class Lecture:
+    def __init__(self, spec, defaults, output_dir):
+        merged = {**defaults, **spec}
+        merged["settings"] = {**defaults.get("settings", {}), **spec.get("settings", {})}
+
+        self.pdf = merged["pdf"]
+        self.name = merged.get("name") or os.path.splitext(os.path.basename(self.pdf))[0]
+        self.instructions = merged.get("instructions") or f"Prepare the lecture from {os.path.basename(self.pdf)}"
+        self.outputs = [o for o in merged.get("outputs", ["pdf", "video"])]
+        unknown = set(self.outputs) - set(OUTPUTS)
+        if unknown:
+            raise ValueError(f"{self.name}: unknown outputs {sorted(unknown)}; choose from {list(OUTPUTS)}")
+
+        # Each lecture retrieves only from its own chunks
+        self.namespace = merged.get("namespace") or re.sub(r"[^\w\-]", "-", self.name.lower())
+        self.top_k = merged.get("top_k", 18)
+        self.retrieval_mode = merged.get("retrieval_mode", "single")
+        self.chunk_size = merged.get("chunk_size", 700)
+        self.chunk_overlap = merged.get("chunk_overlap", 100)
+        self.hls = merged.get("hls", True)
+        self.settings = merged["settings"]
+        self.folder = os.path.join(output_dir, self.name)
+
+        self.ns = None
+        self.results = {}
+        self.files = {}
+        self.stages = {}
+
+    def modes(self):
+        """
+        LLM modes this lecture needs: slides JSON ("text") drives text, audio and video.
+        """
+        modes = []
+        if "pdf" in self.outputs:
+            modes.append("pdf")
+        if {"text", "audio", "video"} & set(self.outputs):
+            modes.append("text")
+        return modes
+
+    def load_scripts(self):
+        ns = {"__name__": "lecture_pipeline_scripts", "__builtins__": __builtins__}
+        ns.update(notebook_namespace())
+        for script in SCRIPTS:
+            path = os.path.join(COMPONENTS_DIR, script)
+            with open(path, "r", encoding="utf-8") as f:
+                exec(compile(f.read(), path, "exec"), ns)
+            if script == "global_variables.py":
+                # Per-lecture settings must be in place before the other scripts bind defaults
+                ns.update(self.settings)
+                ns["file_path"] = self.pdf
+                ns["narration_headless"] = True
+        self.ns = ns
+        return ns
+
+
+# 🔹 Stage: PDF pages -> chunks with page metadata
+def stage_extract(lecture, options):
+    from pdf_extraction import iter_pdf_pages
+
+    os.makedirs(lecture.folder, exist_ok=True)
+    ns = lecture.load_scripts()
+    ns.update(_retrieval_names())
+    ns["pdf_pages"] = list(iter_pdf_pages(lecture.pdf))
+    ns["chunks"] = ns["chunk_and_overlap"](
+        lecture.chunk_size, lecture.chunk_overlap, my_source=lecture.pdf, my_show=False
+    )
+    print(f"📄 [{lecture.name}] {len(ns['pdf_pages'])} pages, {len(ns['chunks'])} chunks")
+
+
+# 🔹 Stage: embed new chunks into the lecture's namespace
+def stage_ingest(lecture, options):
+    ns = lecture.ns
+    ns["embeddings"] = ns["generating_embeddings"](
+        ns["gemini_model_for_embaddings"], os.environ["PINECONE_API_KEY"]
+    )
+    if ns["vector_store_backend"] == "pinecone":
+        ns["pc"] = ns["creating_Index"](ns["Pinecone"](os.environ["PINECONE_API_KEY"]), ns["Index_name"])
+    # distinct_record locks the shared ingestion manifest only while it saves
+    ns["docsearch"] = ns["distinct_record"](lecture.namespace, ns["Index_name"], my_source=lecture.pdf)
+
+
+# 🔹 Stage: one retrieval, then the LLM answers for all of the lecture's modes
+def stage_generate(lecture, options):
+    import asyncio
+
+    ns = lecture.ns
+    modes = lecture.modes()
+    # relevant_knowledge_multi retrieves once and generates the modes concurrently
+    answers = asyncio.run(
+        ns["relevant_knowledge_multi"](
+            ns["gemini_api_key"],
+            lecture.namespace,
+            lecture.top_k,
+            ns["gemini_model_for_query"],
+            lecture.instructions,
+            ns["System_prompts"],
+            modes,
+            retrieval_mode=lecture.retrieval_mode,
+        )
+    )
+    empty = [mode for mode in modes if not answers.get(mode)]
+    if empty:
+        raise RuntimeError(f"empty {', '.join(empty)} answer")
+    lecture.results.update(answers)
+
+    if "pdf" in answers:
+        ns.update(_pdf_names())
+        lecture.files["pdf"] = ns["write_answer_pdf"](
+            answers["pdf"], os.path.join(lecture.folder, f"{lecture.name}.pdf")
+        )
+    if "text" in answers:
+        path = os.path.join(lecture.folder, f"{lecture.name}_slides.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(answers["text"])
+        lecture.files["text"] = path
+
+
+# 🔹 Stage: Kokoro narration per slide (WAV + SRT/VTT)
+def stage_narrate(lecture, options):
+    audio_dir = os.path.join(lecture.folder, "audio")
+    os.makedirs(audio_dir, exist_ok=True)
+    lecture.ns.update(_audio_names())
+    files = lecture.ns["generate_audio_from_slides"](
+        lecture.results["text"], headless=True, audio_dir=audio_dir
+    )
+    if not files:
+        raise RuntimeError("no slide narration produced")
+    lecture.files["audio"] = files
+
+
+# 🔹 Stage: gTTS slide video with aligned captions, chapters and HLS
+def stage_video(lecture, options):
+    import extra_function_of_videoandaudio as videoflow
+    from slide_json_parser import clean_and_parse_json
+    from lecture_packaging import package_lecture
+    from tts_cache import TTSCache
+
+    ns = lecture.ns
+
+    slides_json = clean_and_parse_json(lecture.results["text"])
+    if not slides_json:
+        raise RuntimeError("could not parse the slides JSON")
+
+    # The lecture's own cache settings, not the module defaults
+    synthesize = videoflow.gtts_synthesizer(TTSCache(ns["tts_cache_dir"], ns["tts_cache_max_bytes"]))
+    audio_files, transcripts, slide_info = videoflow.generate_audio_from_slides(slides_json, synthesize=synthesize)
+    if not audio_files:
+        raise RuntimeError("no heading audio produced")
+
+    timeline = videoflow.caption_timeline(transcripts, audio_files)
+    base = os.path.join(lecture.folder, lecture.name)
+    videoflow.create_srt_file(transcripts, slide_info, audio_files, f"{base}.srt", timeline=timeline)
+    videoflow.create_srt_file(transcripts, slide_info, audio_files, f"{base}.vtt", timeline=timeline)
+
+    video_file = f"{base}.mp4"
+    rendered = videoflow.render_video_in_segments(
+        slides_json,
+        audio_files,
+        transcripts,
+        slide_info,
+        video_file,
+        workers=options.render_workers,
+        timeline=timeline,
+        segment_cache_dir=ns["segment_cache_dir"],
+    )
+    if not rendered:
+        raise RuntimeError("video rendering failed")
+    # Chapters follow the segments in the video; skipped headings have none
+    lecture.files["video"] = package_lecture(
+        video_file,
+        [info for info, _ in rendered],
+        [duration for _, duration in rendered],
+        title=lecture.name,
+        hls=lecture.hls,
+    )
+
+
+# ✅ Function: Tasks (id, stage, function, dependencies) for one lecture
+def lecture_tasks(lecture):
+    prefix = lecture.name
+    tasks = [
+        (f"{prefix}:extract", "extract", lambda o: stage_extract(lecture, o), []),
+        (f"{prefix}:ingest", "ingest", lambda o: stage_ingest(lecture, o), [f"{prefix}:extract"]),
+    ]
+    if lecture.modes():
+        tasks.append((f"{prefix}:generate", "generate", lambda o: stage_generate(lecture, o), [f"{prefix}:ingest"]))
+    if "audio" in lecture.outputs:
+        tasks.append((f"{prefix}:narrate", "narrate", lambda o: stage_narrate(lecture, o), [f"{prefix}:generate"]))
+    if "video" in lecture.outputs:
+        tasks.append((f"{prefix}:video", "video", lambda o: stage_video(lecture, o), [f"{prefix}:generate"]))
+    return tasks
+
+
+# ✅ Function: Run every lecture's DAG with per-stage concurrency limits
+def run_pipeline(lectures, options, limits):
+    """
+    A task starts once its dependencies succeeded and its stage has a free
+    slot (per-stage semaphore). At most options.lectures lectures are in
+    flight; when a task fails, only the tasks that depend on it are skipped.
+    """
+    semaphores = {stage: threading.BoundedSemaphore(limit) for stage, limit in limits.items()}
+    owner = {}
+    tasks = {}
+    order = []
+    for lecture in lectures:
+        for task_id, stage, fn, deps in lecture_tasks(lecture):
+            tasks[task_id] = (stage, fn, deps)
+            owner[task_id] = lecture
+            order.append(task_id)
+
+    state = {}  # task_id -> "done" | "failed" | "skipped"
+    active = set()  # lectures that have started and not finished
+
+    def run_task(task_id):
+        stage, fn, _ = tasks[task_id]
+        lecture = owner[task_id]
+        with semaphores[stage]:
+            started = time.time()
+            print(f"▶️ {task_id}")
+            try:
+                fn(options)
+                lecture.stages[task_id] = {"status": "done", "seconds": round(time.time() - started, 2)}
+                print(f"✅ {task_id} ({time.time() - started:.1f}s)")
+                return True
+            except Exception as e:
+                lecture.stages[task_id] = {
+                    "status": "failed",
+                    "seconds": round(time.time() - started, 2),
+                    "error": f"{type(e).__name__}: {e}",
+                }
+                print(f"❌ {task_id}: {e}")
+                traceback.print_exc()
+                return False
+
+    def lecture_finished(lecture):
+        return all(task_id in state for task_id in order if owner[task_id] is lecture)
+
+    # Enough threads that a task waiting for its stage slot never blocks the others
+    with ThreadPoolExecutor(max_workers=max(1, sum(limits.values()))) as pool:
+        running = {}
+        while len(state) < len(order):
+            for task_id in order:
+                if task_id in state or task_id in running.values():
+                    continue
+                deps = tasks[task_id][2]
+                if any(state.get(dep) in ("failed", "skipped") for dep in deps):
+                    state[task_id] = "skipped"
+                    owner[task_id].stages[task_id] = {"status": "skipped"}
+                    continue
+                if not all(state.get(dep) == "done" for dep in deps):
+                    continue
+                lecture = owner[task_id]
+                if lecture not in active:
+                    if len(active) >= options.lectures:
+                        continue
+                    active.add(lecture)
+                running[pool.submit(run_task, task_id)] = task_id
+
+            for lecture in list(active):
+                if lecture_finished(lecture):
+                    active.discard(lecture)
+            if not running:
+                continue  # only skips happened; they may have freed lecture slots
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task_id = running.pop(future)
+                state[task_id] = "done" if future.result() else "failed"
+
+    return state
+
+
+# ✅ Function: Summary of what every lecture produced
+def write_report(lectures, state, output_dir):
+    report = {
+        "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "lectures": {
+            lecture.name: {
+                "pdf": lecture.pdf,
+                "ok": all(info["status"] == "done" for info in lecture.stages.values()),
+                "stages": lecture.stages,
+                "files": lecture.files,
+            }
+            for lecture in lectures
+        },
+    }
+    path = os.path.join(output_dir, "pipeline_report.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    return path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Render many lectures unattended from a JSON manifest.")
+    parser.add_argument("manifest", help="JSON file with {'defaults': {...}, 'lectures': [...]}")
+    parser.add_argument("--output-dir", default=os.path.join(COMPONENTS_DIR, "..", "video_lectures"))
+    parser.add_argument("--lectures", type=int, default=4, help="lectures in flight at once")
+    for stage, limit in DEFAULT_LIMITS.items():
+        parser.add_argument(f"--{stage}-jobs", type=int, default=limit, help=f"concurrent {stage} tasks")
+    parser.add_argument("--render-workers", type=int, default=None, help="processes per video render (default: all cores)")
+    parser.add_argument("--dry-run", action="store_true", help="print the task graph and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+
+    # Manifest paths are relative to the manifest; the scripts' own paths to this folder
+    manifest_dir = os.path.dirname(os.path.abspath(options.manifest))
+    with open(options.manifest, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    output_dir = os.path.abspath(options.output_dir)
+    specs = manifest.get("lectures", [])
+    for spec in specs:
+        spec["pdf"] = os.path.normpath(os.path.join(manifest_dir, spec["pdf"]))
+
+    lectures = [Lecture(spec, manifest.get("defaults", {}), output_dir) for spec in specs]
+    names = [lecture.name for lecture in lectures]
+    if len(set(names)) != len(names):
+        raise SystemExit("❌ Lecture names must be unique")
+
+    limits = {stage: max(1, getattr(options, f"{stage}_jobs")) for stage in DEFAULT_LIMITS}
+    options.lectures = max(1, options.lectures)
+    if options.dry_run:
+        for lecture in lectures:
+            for task_id, stage, _, deps in lecture_tasks(lecture):
+                print(f"{task_id}  [{stage}]  after {', '.join(deps) or '-'}")
+        return 0
+
+    os.chdir(COMPONENTS_DIR)
+    if COMPONENTS_DIR not in sys.path:
+        sys.path.insert(0, COMPONENTS_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+
+    started = time.time()
+    print(f"🚀 {len(lectures)} lectures, stage limits {limits}")
+    state = run_pipeline(lectures, options, limits)
+    report = write_report(lectures, state, output_dir)
+
+    failed = [lecture.name for lecture in lectures if any(s["status"] != "done" for s in lecture.stages.values())]
+    print(f"🏁 Finished in {time.time() - started:.0f}s; report: {report}")
+    if failed:
+        print(f"❌ Incomplete lectures: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,12 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from page_index import parse_page_range, fetch_page_documents
+from ingestion_manifest import load_manifest, chunk_id, document_key
+from response_cache import ResponseCache, response_key, response_scope
+from llm_session import LLMSession
+
+
 def System_prompts(mode: str):
     """
     Returns a system prompt based on the mode.
@@ -74,70 +83,300 @@ Rules:
 
 
 # Example usage
-role, prompt = System_prompts("text")
-print(role)  # system
-print(prompt)  # pdf prompt text
+if __name__ == "__main__":
+    role, prompt = System_prompts("text")
+    print(role)  # system
+    print(prompt)  # pdf prompt text
 
 
-def relevant_knowledge(
+# ✅ Function: Deduplicated, compact context text from retrieved documents
+def compact_context(documents):
+    """
+    Joins the chunk texts once each (overlapping retrievals often return the
+    same chunk twice), labelled with their pages when known.
+    """
+    seen = set()
+    parts = []
+    for doc in documents:
+        text = doc.page_content.strip()
+        key = " ".join(text.split())
+        if not text or key in seen:
+            continue
+        seen.add(key)
+
+        meta = doc.metadata or {}
+        if "page_start" in meta:
+            pages = str(meta["page_start"])
+            if meta.get("page_end", meta["page_start"]) != meta["page_start"]:
+                pages += f"-{meta['page_end']}"
+            parts.append(f"[page {pages}]\n{text}")
+        else:
+            parts.append(text)
+    return "\n\n".join(parts)
+
+
+# ✅ Function: Step 1 of relevant_knowledge, shared by single and multi-mode calls
+def retrieve_documents(
     my_g_api_k,
     my_ns,
     my_k,
     my_g_qmodel,
     task_instruction,
-    prompt_type,
-    mode,
-    instructions,
+    session,
+    retrieval_mode="single",
 ):
+    """
+    Returns (documents, content): the retrieved chunks and the context that is
+    passed to the final LLM call.
+    """
+    # 🔹 Step 1a: Requests that name pages are answered by an exact page lookup
+    page_docs = []
+    page_ranges = parse_page_range(task_instruction)
+    if page_ranges:
+        # Only the current PDF's pages, not every document in the namespace
+        page_docs = fetch_page_documents(
+            docsearch if vector_store_backend == "local" else pc.Index(Index_name),
+            my_ns,
+            load_manifest(ingestion_manifest_path),
+            document_key(Index_name, my_ns, file_path, vector_store_backend, local_vector_store_path),
+            page_ranges,
+        )
 
-    # ✅ Load retrieval QA prompt from LangChain Hub
-    retrieval_qa_chat_prompt = hub.pull("langchain-ai/retrieval-qa-chat")
+    if page_docs:
+        pages = ", ".join(f"{a}-{b}" if a != b else str(a) for a, b in page_ranges)
+        print(f"📄 Page lookup {pages}: {len(page_docs)} chunks")
+        documents = page_docs
+        retrieval_result = {"input": task_instruction, "context": page_docs}
+    elif retrieval_mode == "single":
+        # 🔹 Step 1b: Fetch the documents once (no intermediate LLM answer)
+        retriever = session.retriever(docsearch, my_ns, my_k)
+        documents = retriever.invoke(task_instruction)
+    elif retrieval_mode == "two_stage":
+        # ✅ Retrieval chain (hub prompt cached on disk, built once per namespace/k/model)
+        retrieval_chain = session.retrieval_chain(
+            docsearch, my_ns, my_k, my_g_qmodel, my_g_api_k
+        )
 
-    # ✅ Create a retriever from your Pinecone vectorstore
-    retriever = docsearch.as_retriever(search_kwargs={"namespace": my_ns, "k": my_k})
+        # 🔹 Step 1b: Get context from vectorstore
+        retrieval_result = retrieval_chain.invoke({"input": task_instruction})
+    else:
+        raise ValueError(
+            f"Invalid retrieval_mode '{retrieval_mode}'. Choose from: ['single', 'two_stage']"
+        )
 
-    # ✅ Gemini model for retrieval step
-    llm_for_retrieval = ChatGoogleGenerativeAI(
-        model=my_g_qmodel, temperature=0.0, google_api_key=my_g_api_k
-    )
+    # 🔹 Step 2: Context for the final call
+    if retrieval_mode == "two_stage":
+        return retrieval_result.get("context", []), retrieval_result
+    return documents, compact_context(documents)
 
-    # ✅ Combine docs chain
-    combine_docs_chain = create_stuff_documents_chain(
-        llm_for_retrieval, retrieval_qa_chat_prompt
-    )
 
-    # ✅ Retrieval chain
-    retrieval_chain = create_retrieval_chain(retriever, combine_docs_chain)
+# ✅ Function: Look up a cached answer; also returns what cache.put needs later
+def lookup_cached_response(cache, mode, system_prompt, my_g_qmodel, task_instruction, documents):
+    chunk_ids = [chunk_id(doc.page_content) for doc in documents]
+    scope = response_scope(mode, system_prompt, my_g_qmodel, chunk_ids)
+    key = response_key(mode, system_prompt, task_instruction, my_g_qmodel, chunk_ids)
+    cached = cache.get(key)
 
-    # 🔹 Step 1: Get context from vectorstore
-    retrieval_result = retrieval_chain.invoke({"input": task_instruction})
-    context = retrieval_result["answer"]
+    query_vector = None
+    if cached is None and response_cache_similarity:
+        query_vector = docsearch.embeddings.embed_query(task_instruction)
+        cached = cache.get_similar(scope, query_vector, response_cache_similarity)
+    return cached, (key, scope, query_vector)
 
-    messages = [
-        prompt_type(mode),
+
+def generation_messages(system_prompt, content, task_instruction):
+    return [
+        system_prompt,
         (
             "user",
-            f"Based only on the following content:\n\n{retrieval_result}\n\nTask: {task_instruction}",
+            f"Based only on the following content:\n\n{content}\n\nTask: {task_instruction}",
         ),
     ]
 
-    # ✅ Step 3: Final LLM call
-    llm_for_task = ChatGoogleGenerativeAI(
-        model=my_g_qmodel, temperature=0.0, google_api_key=my_g_api_k
+
+def relevant_knowledge(
+    my_g_api_k,
+    my_ns,
+    my_k,
+    my_g_qmodel,
+    task_instruction,
+    prompt_type,
+    mode,
+    instructions,
+    session=None,
+    retrieval_mode="single",
+    cache=None,
+):
+    """
+    retrieval_mode="single": fetch the documents once and make one LLM call.
+    retrieval_mode="two_stage": old behaviour, a retrieval QA chain answers
+    first and its whole result is passed to a second LLM call.
+    cache=False disables the response cache for this call.
+    """
+    # Prompt, clients and chains are built once per session and reused
+    session = session or llm_session
+    cache = response_cache if cache is None else cache
+
+    documents, content = retrieve_documents(
+        my_g_api_k, my_ns, my_k, my_g_qmodel, task_instruction, session, retrieval_mode
     )
+    system_prompt = prompt_type(mode)
+
+    # ✅ Same mode, prompt, instruction, model and chunks -> cached answer
+    if cache:
+        cached, cache_entry = lookup_cached_response(
+            cache, mode, system_prompt, my_g_qmodel, task_instruction, documents
+        )
+        if cached is not None:
+            print("♻️ Using cached response")
+            print(cached)
+            return cached
+
+    messages = generation_messages(system_prompt, content, task_instruction)
+
+    # ✅ Step 3: Final LLM call (pooled client)
+    llm_for_task = session.chat_model(my_g_qmodel, my_g_api_k)
 
     final_result = llm_for_task.invoke(messages)
     content_text = final_result.content.strip()
     print(content_text)
 
-    return final_result.content.strip()
+    if cache and content_text:
+        key, scope, query_vector = cache_entry
+        cache.put(key, scope, content_text, query_vector)
+
+    return content_text
+
+
+# ✅ Function: Streaming version of relevant_knowledge (yields text as it arrives)
+def stream_relevant_knowledge(
+    my_g_api_k,
+    my_ns,
+    my_k,
+    my_g_qmodel,
+    task_instruction,
+    prompt_type,
+    mode,
+    session=None,
+    retrieval_mode="single",
+    cache=None,
+):
+    """
+    Generator of text pieces. A cached answer is yielded in one piece; a fresh
+    answer is yielded chunk by chunk and cached once the stream completes.
+    """
+    session = session or llm_session
+    cache = response_cache if cache is None else cache
+
+    documents, content = retrieve_documents(
+        my_g_api_k, my_ns, my_k, my_g_qmodel, task_instruction, session, retrieval_mode
+    )
+    system_prompt = prompt_type(mode)
+
+    if cache:
+        cached, cache_entry = lookup_cached_response(
+            cache, mode, system_prompt, my_g_qmodel, task_instruction, documents
+        )
+        if cached is not None:
+            print("♻️ Using cached response")
+            yield cached
+            return
+
+    messages = generation_messages(system_prompt, content, task_instruction)
+    llm_for_task = session.chat_model(my_g_qmodel, my_g_api_k)
+
+    parts = []
+    for chunk in llm_for_task.stream(messages):
+        piece = chunk.content if isinstance(chunk.content, str) else "".join(
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for part in chunk.content
+        )
+        if piece:
+            parts.append(piece)
+            yield piece
+
+    content_text = "".join(parts).strip()
+    if cache and content_text:
+        key, scope, query_vector = cache_entry
+        cache.put(key, scope, content_text, query_vector)
+
+
+# ✅ Function: Retrieve once, then generate several modes concurrently
+async def relevant_knowledge_multi(
+    my_g_api_k,
+    my_ns,
+    my_k,
+    my_g_qmodel,
+    task_instruction,
+    prompt_type,
+    modes,
+    session=None,
+    retrieval_mode="single",
+    cache=None,
+):
+    """
+    Returns {mode: result}. Retrieval runs once; the per-mode generations run
+    at the same time, so the total time is roughly that of the slowest mode.
+    """
+    session = session or llm_session
+    cache = response_cache if cache is None else cache
+
+    documents, content = await asyncio.to_thread(
+        retrieve_documents,
+        my_g_api_k,
+        my_ns,
+        my_k,
+        my_g_qmodel,
+        task_instruction,
+        session,
+        retrieval_mode,
+    )
+    llm_for_task = session.chat_model(my_g_qmodel, my_g_api_k)
+
+    async def generate(mode):
+        system_prompt = prompt_type(mode)
+        if cache:
+            cached, cache_entry = await asyncio.to_thread(
+                lookup_cached_response,
+                cache,
+                mode,
+                system_prompt,
+                my_g_qmodel,
+                task_instruction,
+                documents,
+            )
+            if cached is not None:
+                print(f"♻️ Using cached response for {mode}")
+                return cached
+
+        print(f"🚀 Generating {mode}...")
+        messages = generation_messages(system_prompt, content, task_instruction)
+        final_result = await llm_for_task.ainvoke(messages)
+        content_text = final_result.content.strip()
+
+        if cache and content_text:
+            key, scope, query_vector = cache_entry
+            cache.put(key, scope, content_text, query_vector)
+        print(f"✅ {mode} done")
+        return content_text
+
+    results = await asyncio.gather(*(generate(mode) for mode in modes))
+    return dict(zip(modes, results))
 
 
 task_instruction = "extract the text from page number 3 of given pdf..."
 
+# One session for the whole process, shared by every run_llm call
+llm_session = LLMSession(hub_prompt_cache_dir)
+response_cache = ResponseCache(
+    response_cache_path,
+    ttl_seconds=response_cache_ttl,
+    max_entries=response_cache_max_entries,
+)
+
 
 # 🔹 Common function for LLM call with mode
-def run_llm(mode, instructions=None):
+def run_llm(mode, instructions=None, retrieval_mode="single"):
     return relevant_knowledge(
         gemini_api_key,
         "myproaivectors",
@@ -147,4 +386,47 @@ def run_llm(mode, instructions=None):
         System_prompts,  # for prompt_type
         mode,  # for mode
         task_instruction,  # for instructions param
+        retrieval_mode=retrieval_mode,
+    )
+
+
+# 🔹 Streaming counterpart of run_llm
+def stream_llm(mode, instructions=None, retrieval_mode="single"):
+    return stream_relevant_knowledge(
+        gemini_api_key,
+        "myproaivectors",
+        18,
+        gemini_model_for_query,
+        task_instruction,
+        System_prompts,
+        mode,
+        retrieval_mode=retrieval_mode,
     )
+
+
+# 🔹 All modes from one retrieval, e.g. run_llm_batch(["pdf", "text", "audio", "video"])
+def run_llm_batch(modes=("pdf", "text", "audio", "video"), instructions=None, retrieval_mode="single"):
+    modes = list(modes)
+    for mode in modes:
+        System_prompts(mode)  # fail fast on an invalid mode
+
+    def make_job():
+        return relevant_knowledge_multi(
+            gemini_api_key,
+            "myproaivectors",
+            18,
+            gemini_model_for_query,
+            instructions or task_instruction,
+            System_prompts,
+            modes,
+            retrieval_mode=retrieval_mode,
+        )
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(make_job())
+
+    # Inside Jupyter an event loop is already running, so use a helper thread
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(lambda: asyncio.run(make_job())).result()
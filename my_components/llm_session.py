@@ -0,0 +1,90 @@
+import os
+import threading
+
+
+# ✅ Class: Long-lived objects shared by every run_llm call
+class LLMSession:
+    """
+    Builds the expensive pieces of relevant_knowledge once and reuses them:
+
+    - the LangChain Hub prompt, cached on disk so later runs never hit the Hub
+    - ChatGoogleGenerativeAI clients (and their HTTP connections), one per
+      (model, temperature, api key)
+    - retrievers and retrieval chains, one per (vectorstore, namespace, k, model)
+    """
+
+    def __init__(self, prompt_cache_dir):
+        self.prompt_cache_dir = prompt_cache_dir
+        self._prompts = {}
+        self._models = {}
+        self._chains = {}
+        self._lock = threading.RLock()
+
+    # ✅ Hub prompt: memory -> disk -> LangChain Hub
+    def hub_prompt(self, name="langchain-ai/retrieval-qa-chat"):
+        with self._lock:
+            if name in self._prompts:
+                return self._prompts[name]
+
+            from langchain_core.load import dumps, loads
+
+            cache_file = os.path.join(self.prompt_cache_dir, name.replace("/", "__") + ".json")
+            prompt = None
+            if os.path.exists(cache_file):
+                try:
+                    with open(cache_file, "r", encoding="utf-8") as f:
+                        prompt = loads(f.read())
+                except Exception as e:
+                    print(f"⚠️ Cached prompt {cache_file} unreadable ({e}), pulling again")
+
+            if prompt is None:
+                from langchain import hub
+
+                prompt = hub.pull(name)
+                os.makedirs(self.prompt_cache_dir, exist_ok=True)
+                with open(cache_file, "w", encoding="utf-8") as f:
+                    f.write(dumps(prompt))
+
+            self._prompts[name] = prompt
+            return prompt
+
+    # ✅ One chat client per (model, temperature, api key)
+    def chat_model(self, model, api_key, temperature=0.0):
+        key = (model, temperature, api_key)
+        with self._lock:
+            if key not in self._models:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+
+                self._models[key] = ChatGoogleGenerativeAI(
+                    model=model, temperature=temperature, google_api_key=api_key
+                )
+            return self._models[key]
+
+    # ✅ One retriever per (vectorstore, namespace, k)
+    def retriever(self, vectorstore, namespace, k):
+        key = ("retriever", id(vectorstore), namespace, k)
+        with self._lock:
+            if key not in self._chains:
+                self._chains[key] = (
+                    vectorstore,
+                    vectorstore.as_retriever(search_kwargs={"namespace": namespace, "k": k}),
+                )
+            return self._chains[key][1]
+
+    # ✅ One retrieval chain per (vectorstore, namespace, k, model)
+    def retrieval_chain(self, vectorstore, namespace, k, model, api_key):
+        key = (id(vectorstore), namespace, k, model, api_key)
+        with self._lock:
+            if key not in self._chains:
+                from langchain.chains import create_retrieval_chain
+                from langchain.chains.combine_documents import create_stuff_documents_chain
+
+                retriever = self.retriever(vectorstore, namespace, k)
+                combine_docs_chain = create_stuff_documents_chain(
+                    self.chat_model(model, api_key), self.hub_prompt()
+                )
+                self._chains[key] = (
+                    vectorstore,
+                    create_retrieval_chain(retriever, combine_docs_chain),
+                )
+            return self._chains[key][1]
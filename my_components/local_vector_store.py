@@ -0,0 +1,395 @@
+import os
+import json
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+
+# Namespaces with at least this many vectors get an approximate (IVF) index
+IVF_MIN_VECTORS = 20000
+
+
+# ✅ Function: Pinecone-style metadata filter ({"page": 3}, {"page": {"$lte": 5}})
+def matches_filter(metadata, filter):
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, expected in condition.items():
+            if op == "$eq" and not value == expected:
+                return False
+            if op == "$ne" and not value != expected:
+                return False
+            if op == "$in" and value not in expected:
+                return False
+            if op == "$nin" and value in expected:
+                return False
+            if value is None and op in ("$gt", "$gte", "$lt", "$lte"):
+                return False
+            if op == "$gt" and not value > expected:
+                return False
+            if op == "$gte" and not value >= expected:
+                return False
+            if op == "$lt" and not value < expected:
+                return False
+            if op == "$lte" and not value <= expected:
+                return False
+    return True
+
+
+# ✅ Function: Row-normalize so cosine similarity is a plain dot product
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# ✅ Function: Top-k row indices of a score vector, best first
+def _top_k(scores, k):
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+# ✅ Function: Spherical k-means used to build the IVF index
+def build_ivf(vectors, nlist, iterations=10, seed=0):
+    """
+    Returns (centroids, assignments) for normalized vectors.
+    """
+    rng = np.random.default_rng(seed)
+    nlist = max(1, min(nlist, vectors.shape[0]))
+    centroids = np.array(vectors[rng.choice(vectors.shape[0], nlist, replace=False)])
+
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        empty = ~sums.any(axis=1)
+        sums[empty] = centroids[empty]
+        centroids = _normalize(sums)
+
+    assignments = np.argmax(vectors @ centroids.T, axis=1)
+    return centroids, assignments
+
+
+class _Namespace:
+    """
+    One namespace on disk: vectors.npy (float32, memory-mapped), records.json
+    (ids, texts, metadata) and, for large namespaces, an IVF index.
+    Changes stay in memory (dirty) until save().
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.vectors_path = os.path.join(folder, "vectors.npy")
+        self.records_path = os.path.join(folder, "records.json")
+        self.ivf_path = os.path.join(folder, "ivf.npz")
+        self.vectors = None
+        self.ids = []
+        self.texts = []
+        self.metadatas = []
+        self.ivf = None
+        self.dirty = False
+        self._pending = []  # appended row blocks, concatenated on first read
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.records_path):
+            with open(self.records_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            self.ids = records["ids"]
+            self.texts = records["texts"]
+            self.metadatas = records["metadatas"]
+        if os.path.exists(self.vectors_path):
+            self.vectors = np.load(self.vectors_path, mmap_mode="r")
+        if os.path.exists(self.ivf_path):
+            with np.load(self.ivf_path) as data:
+                self.ivf = (data["centroids"], data["assignments"])
+        self.positions = {cid: row for row, cid in enumerate(self.ids)}
+
+    def matrix(self):
+        """
+        All vectors (pending appends included), or None for an empty namespace.
+        """
+        if self._pending:
+            blocks = [] if self.vectors is None else [np.asarray(self.vectors)]
+            self.vectors = np.concatenate(blocks + self._pending)
+            self._pending = []
+        return self.vectors
+
+    def writable(self):
+        # An in-memory copy replaces the read-only memory map on the first change
+        if isinstance(self.matrix(), np.memmap):
+            self.vectors = np.array(self.vectors)
+        return self.vectors
+
+    def append(self, rows):
+        self._pending.append(rows)
+        self.changed()
+
+    def changed(self):
+        self.dirty = True
+        self.ivf = None  # stale; rebuilt after the next save
+
+    def save(self):
+        os.makedirs(self.folder, exist_ok=True)
+        vectors = np.ascontiguousarray(self.matrix(), dtype=np.float32)
+
+        # Release the memory map before the file is replaced
+        self.vectors = None
+        tmp_path = self.vectors_path + ".tmp.npy"
+        np.save(tmp_path, vectors)
+        os.replace(tmp_path, self.vectors_path)
+
+        tmp_path = self.records_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas}, f)
+        os.replace(tmp_path, self.records_path)
+
+        # Any existing IVF index is stale now
+        self.ivf = None
+        if os.path.exists(self.ivf_path):
+            os.remove(self.ivf_path)
+
+        self.vectors = np.load(self.vectors_path, mmap_mode="r")
+        self.positions = {cid: row for row, cid in enumerate(self.ids)}
+        self.dirty = False
+
+    def save_ivf(self, centroids, assignments):
+        np.savez(self.ivf_path, centroids=centroids, assignments=assignments)
+        self.ivf = (centroids, assignments)
+
+
+# ✅ Class: Offline vector store (NumPy brute force + optional IVF index)
+class LocalVectorStore(VectorStore):
+    """
+    Drop-in local replacement for PineconeVectorStore.
+
+    Vectors live in a memory-mapped float32 matrix per namespace. Search is an
+    exact vectorized cosine top-k, or an IVF search (nprobe closest clusters)
+    once a namespace has at least ivf_min_vectors vectors. as_retriever()
+    works exactly like it does for Pinecone, including search_kwargs
+    {"namespace": ..., "k": ..., "filter": ...}.
+    """
+
+    def __init__(
+        self,
+        embedding,
+        folder,
+        namespace="default",
+        text_key="text",
+        ivf_min_vectors=IVF_MIN_VECTORS,
+        nprobe=8,
+    ):
+        self._embedding = embedding
+        self.folder = folder
+        self.namespace = namespace
+        self.text_key = text_key
+        self.ivf_min_vectors = ivf_min_vectors
+        self.nprobe = nprobe
+        self._namespaces = {}
+        self._lock = threading.Lock()
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def _ns(self, namespace=None):
+        name = namespace or self.namespace
+        if name not in self._namespaces:
+            self._namespaces[name] = _Namespace(os.path.join(self.folder, name))
+        return self._namespaces[name]
+
+    # ---------- writing ----------
+
+    def add_embeddings(self, ids, vectors, metadatas=None, texts=None, namespace=None, flush=True):
+        """
+        Upsert precomputed vectors. When texts is None the text is taken from
+        metadata[text_key], the same layout batch_ingest writes to Pinecone.
+        flush=False keeps the change in memory until flush(), so ingesting in
+        many batches writes the namespace once instead of once per batch.
+        """
+        metadatas = [dict(m) for m in (metadatas or [{} for _ in ids])]
+        if texts is None:
+            texts = [m.pop(self.text_key, "") for m in metadatas]
+
+        # If an ID repeats inside the batch the last record wins
+        last = {cid: row for row, cid in enumerate(ids)}
+        keep = sorted(last.values())
+        ids = [ids[row] for row in keep]
+        texts = [texts[row] for row in keep]
+        metadatas = [metadatas[row] for row in keep]
+        new_rows = _normalize(vectors)[keep]
+
+        with self._lock:
+            ns = self._ns(namespace)
+            appended = []
+            for row, (cid, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+                position = ns.positions.get(cid)
+                if position is None:
+                    ns.positions[cid] = len(ns.ids)
+                    ns.ids.append(cid)
+                    ns.texts.append(text)
+                    ns.metadatas.append(metadata)
+                    appended.append(row)
+                else:
+                    ns.writable()[position] = new_rows[row]
+                    ns.texts[position] = text
+                    ns.metadatas[position] = metadata
+                    ns.changed()
+
+            if appended:
+                ns.append(new_rows[appended])
+        if flush:
+            self.flush(namespace)
+        return list(ids)
+
+    def flush(self, namespace=None):
+        """
+        Write a namespace's pending changes to disk, then rebuild its IVF
+        index if it is large enough to use one.
+        """
+        with self._lock:
+            ns = self._ns(namespace)
+            if not ns.dirty:
+                return
+            ns.save()
+        if len(ns.ids) >= self.ivf_min_vectors:
+            self.build_index(namespace=namespace)
+
+    def upserter(self, namespace=None):
+        """
+        upsert_batch(ids, vectors, metadatas) callback for batch_ingest.embed_and_upsert.
+        Batches stay in memory; call flush() after the last one.
+        """
+
+        def upsert_batch(ids, vectors, metadatas):
+            self.add_embeddings(ids, vectors, metadatas, namespace=namespace, flush=False)
+
+        upsert_batch.text_key = self.text_key
+        return upsert_batch
+
+    def add_texts(self, texts, metadatas=None, ids=None, namespace=None, **kwargs):
+        texts = list(texts)
+        if ids is None:
+            import hashlib
+
+            ids = [hashlib.md5(text.encode()).hexdigest() for text in texts]
+        vectors = self._embedding.embed_documents(texts)
+        return self.add_embeddings(ids, vectors, metadatas, texts=texts, namespace=namespace)
+
+    def delete(self, ids=None, namespace=None, flush=True, **kwargs):
+        if not ids:
+            return False
+        with self._lock:
+            ns = self._ns(namespace)
+            doomed = {ns.positions[cid] for cid in ids if cid in ns.positions}
+            if not doomed:
+                return False
+            keep = [row for row in range(len(ns.ids)) if row not in doomed]
+            ns.vectors = np.asarray(ns.matrix())[keep]
+            ns.ids = [ns.ids[row] for row in keep]
+            ns.texts = [ns.texts[row] for row in keep]
+            ns.metadatas = [ns.metadatas[row] for row in keep]
+            ns.positions = {cid: row for row, cid in enumerate(ns.ids)}
+            ns.changed()
+        if flush:
+            self.flush(namespace)
+        return True
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, folder="vector_store", namespace="default", **kwargs):
+        store = cls(embedding, folder, namespace=namespace, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    # ---------- reading ----------
+
+    def get_by_ids(self, ids, namespace=None):
+        ns = self._ns(namespace)
+        documents = []
+        for cid in ids:
+            row = ns.positions.get(cid)
+            if row is not None:
+                documents.append(
+                    Document(id=cid, page_content=ns.texts[row], metadata=dict(ns.metadatas[row]))
+                )
+        return documents
+
+    def count(self, namespace=None):
+        return len(self._ns(namespace).ids)
+
+    def build_index(self, namespace=None, nlist=None):
+        """
+        Build (or rebuild) the IVF index of a namespace.
+        """
+        ns = self._ns(namespace)
+        if ns.matrix() is None or len(ns.ids) == 0:
+            return
+        nlist = nlist or max(1, int(np.sqrt(len(ns.ids))))
+        centroids, assignments = build_ivf(np.asarray(ns.matrix()), nlist)
+        ns.save_ivf(centroids, assignments)
+
+    def _candidates(self, ns, query, namespace=None):
+        if len(ns.ids) < self.ivf_min_vectors:
+            return None
+        if ns.ivf is None:
+            self.build_index(namespace=namespace)
+        centroids, assignments = ns.ivf
+        probes = _top_k(centroids @ query, self.nprobe)
+        return np.flatnonzero(np.isin(assignments, probes))
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None, namespace=None, **kwargs):
+        ns = self._ns(namespace)
+        vectors = ns.matrix()
+        if vectors is None or len(ns.ids) == 0:
+            return []
+
+        query = _normalize(embedding)
+        rows = self._candidates(ns, query, namespace)
+        if filter:
+            allowed = np.array(
+                [row for row, meta in enumerate(ns.metadatas) if matches_filter(meta, filter)],
+                dtype=np.int64,
+            )
+            rows = allowed if rows is None else np.intersect1d(rows, allowed)
+
+        if rows is None:
+            scores = vectors @ query
+            best = _top_k(scores, k)
+            best_scores = scores[best]
+        else:
+            scores = vectors[rows] @ query
+            picked = _top_k(scores, k)
+            best, best_scores = rows[picked], scores[picked]
+
+        return [
+            (
+                Document(id=ns.ids[row], page_content=ns.texts[row], metadata=dict(ns.metadatas[row])),
+                float(score),
+            )
+            for row, score in zip(best, best_scores)
+        ]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, namespace=None, **kwargs):
+        embedding = self._embedding.embed_query(query)
+        return self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter, namespace=namespace)
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, namespace=None, **kwargs):
+        results = self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter, namespace=namespace)
+        return [doc for doc, _ in results]
+
+    def similarity_search(self, query, k=4, filter=None, namespace=None, **kwargs):
+        results = self.similarity_search_with_score(query, k=k, filter=filter, namespace=namespace)
+        return [doc for doc, _ in results]
+
+    def _select_relevance_score_fn(self):
+        # Scores are already cosine similarities
+        return lambda score: score
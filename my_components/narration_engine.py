@@ -0,0 +1,148 @@
+import threading
+
+import numpy as np
+
+from tts_cache import tts_cache_key, encode_wav, decode_wav
+from audio_postprocess import master_segments, DEFAULT_TARGET_DB, DEFAULT_SILENCE_DB
+from caption_alignment import align_words, words_from_tokens
+
+
+KOKORO_SAMPLE_RATE = 24000
+
+_pipelines = {}
+_pipeline_lock = threading.Lock()
+# KPipeline is not safe to run from several threads at once
+_synthesis_lock = threading.Lock()
+
+
+# ✅ Function: Load KPipeline once per language and reuse it
+def get_pipeline(lang_code="a", num_threads=None):
+    """
+    The Kokoro model is loaded lazily on first use and shared by every later
+    call. num_threads (if given) sets torch's CPU thread count.
+    """
+    with _pipeline_lock:
+        if num_threads:
+            import torch
+
+            torch.set_num_threads(num_threads)
+
+        if lang_code not in _pipelines:
+            from kokoro import KPipeline
+
+            print(f"⏳ Loading Kokoro pipeline (lang_code={lang_code!r})...")
+            _pipelines[lang_code] = KPipeline(lang_code=lang_code)
+        return _pipelines[lang_code]
+
+
+def _to_numpy(audio):
+    if hasattr(audio, "detach"):
+        audio = audio.detach().cpu().numpy()
+    return np.asarray(audio, dtype=np.float32)
+
+
+def _chunk_word_timings(audio, chunk_text, starts, trimmed):
+    words = []
+    ends = starts[1:] + [len(audio)]
+    for (gs, tokens), start, end, cut in zip(chunk_text, starts, ends, trimmed):
+        # Token times are relative to the untrimmed chunk
+        timed = words_from_tokens(tokens, (start - cut) / KOKORO_SAMPLE_RATE)
+        if timed is None:
+            timed = align_words(
+                str(gs).split(), audio[start:end], KOKORO_SAMPLE_RATE, offset=start / KOKORO_SAMPLE_RATE
+            )
+        words += timed
+    return words
+
+
+# ✅ Function: Narrate many texts with one pipeline
+def synthesize_segments(
+    texts,
+    voice="am_onyx",
+    speed=1,
+    lang_code="a",
+    num_threads=None,
+    headless=True,
+    cache=None,
+    crossfade_ms=0,
+    word_timings=None,
+    target_db=DEFAULT_TARGET_DB,
+    threshold_db=DEFAULT_SILENCE_DB,
+):
+    """
+    Returns one float32 array (24 kHz) per text, or None for texts that
+    produced no audio. With headless=False every chunk is also shown as an
+    IPython Audio widget, like the notebook used to do. With a TTSCache,
+    texts narrated before (same voice/speed/language) are not synthesized again.
+    Each text is mastered in one audio_postprocess.master_segments pass:
+    leading/trailing silence trimmed at threshold_db and the whole narration
+    levelled to target_db (None keeps either as is). With crossfade_ms, the
+    pipeline's chunks are also joined with the silence between them trimmed
+    and a short crossfade instead of plain concatenation.
+
+    Pass a list as word_timings to receive, per text, [(word, start, end)] in
+    seconds of the returned audio: Kokoro's token timestamps where the voice
+    provides them, else energy alignment within each pipeline chunk. Entries
+    stay None for cache hits (align those with caption_alignment.align_words).
+    """
+    texts = list(texts)
+    results = [None] * len(texts)
+    if word_timings is not None:
+        word_timings[:] = [None] * len(texts)
+    # Mastered audio depends on the crossfade and levels, so they are part of the cache identity
+    backend = f"kokoro+xf{crossfade_ms}+{target_db}/{threshold_db}"
+    keys = [tts_cache_key(backend, voice, speed, lang_code, text) for text in texts]
+
+    todo = []
+    for i, key in enumerate(keys):
+        hit = cache.get(key) if cache is not None else None
+        if hit is None:
+            todo.append(i)
+        else:
+            results[i] = decode_wav(hit[0])[0]
+    if cache is not None and len(todo) < len(texts):
+        print(f"♻️ {len(texts) - len(todo)}/{len(texts)} narrations reused from the TTS cache")
+    if not todo:
+        return results
+
+    pipeline = get_pipeline(lang_code, num_threads)
+    if not headless:
+        from IPython.display import display, Audio
+
+    with _synthesis_lock:
+        for i in todo:
+            text = texts[i]
+            chunks = []
+            chunk_text = []
+            for j, result in enumerate(pipeline(text, voice=voice, speed=speed)):
+                gs, ps, audio = result
+                if audio is None:
+                    continue
+                audio = _to_numpy(audio)
+                if not headless:
+                    display(Audio(data=audio, rate=KOKORO_SAMPLE_RATE, autoplay=(j == 0)))
+                chunks.append(audio)
+                chunk_text.append((gs, getattr(result, "tokens", None)))
+            if chunks:
+                # Trim, level and join in one pass; bounds give each chunk's trim offset
+                joined = bool(crossfade_ms) and len(chunks) > 1
+                results[i], starts, bounds = master_segments(
+                    chunks,
+                    KOKORO_SAMPLE_RATE,
+                    target_db=target_db,
+                    threshold_db=threshold_db,
+                    crossfade_ms=crossfade_ms if joined else 0,
+                    level="whole",
+                    trim_inner=joined,
+                )
+                if word_timings is not None:
+                    trimmed = [start for start, _ in bounds]
+                    word_timings[i] = _chunk_word_timings(results[i], chunk_text, starts, trimmed)
+                if cache is not None:
+                    cache.put(
+                        keys[i],
+                        encode_wav(results[i], KOKORO_SAMPLE_RATE),
+                        len(results[i]) / KOKORO_SAMPLE_RATE,
+                        "wav",
+                    )
+    return results
@@ -0,0 +1,134 @@
+import re
+from bisect import bisect_right
+
+
+# "page 3", "page number 3", "page no. 3", "pages 3-5", "pages 3 to 5", "p. 3",
+# "pages 3 and 5", "pages 3, 5 and 7-9"
+PAGE_PATTERN = re.compile(
+    r"\b(?:pages?|pg\.?|p\.)\s*(?:numbers?|no\.?|#)?\s*"
+    r"(\d+(?:\s*(?:-|–|to|through|and|,|&)\s*\d+)*)",
+    re.IGNORECASE,
+)
+PAGE_RANGE = re.compile(r"(\d+)(?:\s*(?:-|–|to|through)\s*(\d+))?", re.IGNORECASE)
+
+
+def _locate_chunk(full_text, chunk, search_from):
+    """
+    (start, end) of chunk in full_text. The splitter drops empty lines and
+    re-joins with a single "\n", so a chunk spanning a blank line (every page
+    boundary) is not a literal substring; whitespace runs match loosely then.
+    """
+    start = full_text.find(chunk, search_from)
+    if start >= 0:
+        return start, start + len(chunk)
+    pattern = re.compile(r"\s+".join(re.escape(word) for word in chunk.split()))
+    match = pattern.search(full_text, search_from) or pattern.search(full_text)
+    if match:
+        return match.start(), match.end()
+    return None
+
+
+# ✅ Function: Split pages into chunks that remember where they came from
+def build_page_documents(pages, text_splitter, source):
+    """
+    pages: [(page_number, text), ...] as yielded by iter_pdf_pages.
+    Returns Documents with source, page_start, page_end, char_start and
+    char_end metadata (char offsets are into the pages joined with "\\n").
+    """
+    from langchain_core.documents import Document
+
+    page_numbers = []
+    page_offsets = []
+    parts = []
+    offset = 0
+    for page_number, text in pages:
+        page_numbers.append(page_number)
+        page_offsets.append(offset)
+        parts.append(text)
+        offset += len(text) + 1  # "\n" between pages
+
+    full_text = "\n".join(parts)
+    documents = []
+    search_from = 0
+    for chunk in text_splitter.split_text(full_text):
+        # Not found at all (should not happen): assume it follows the previous chunk
+        char_start, char_end = _locate_chunk(full_text, chunk, search_from) or (
+            search_from,
+            min(search_from + len(chunk), len(full_text)),
+        )
+        search_from = char_start + 1
+
+        first = page_numbers[bisect_right(page_offsets, char_start) - 1]
+        last = page_numbers[bisect_right(page_offsets, max(char_end - 1, char_start)) - 1]
+        documents.append(
+            Document(
+                page_content=chunk,
+                metadata={
+                    "source": source,
+                    "page_start": first,
+                    "page_end": last,
+                    "char_start": char_start,
+                    "char_end": char_end,
+                },
+            )
+        )
+    return documents
+
+
+# ✅ Function: Find the pages a request refers to
+def parse_page_range(task_instruction):
+    """
+    Returns [(first_page, last_page), ...] if the instruction names pages,
+    else None. "pages 3-5" is one range, "pages 3 and 5" two single pages.
+    """
+    match = PAGE_PATTERN.search(task_instruction or "")
+    if not match:
+        return None
+    ranges = []
+    for first, last in PAGE_RANGE.findall(match.group(1)):
+        first, last = int(first), int(last or first)
+        ranges.append((min(first, last), max(first, last)))
+    return ranges
+
+
+# ✅ Function: Chunk IDs of one document overlapping any of the page ranges
+def chunk_ids_for_pages(manifest, doc_key, page_ranges):
+    ids = []
+    for cid, (page_start, page_end) in manifest.get(doc_key, {}).get("pages", {}).items():
+        if any(page_start <= last and page_end >= first for first, last in page_ranges):
+            ids.append(cid)
+    return ids
+
+
+# ✅ Function: Exact page lookup (no query embedding, no vector search)
+# index is a Pinecone Index or a LocalVectorStore; doc_key is the PDF's manifest key
+# (document_key), so other PDFs in the same namespace are not mixed in
+def fetch_page_documents(index, namespace, manifest, doc_key, page_ranges, text_key="text"):
+    from langchain_core.documents import Document
+
+    ids = chunk_ids_for_pages(manifest, doc_key, page_ranges)
+    if not ids:
+        return []
+
+    documents = []
+    if hasattr(index, "get_by_ids"):
+        # LocalVectorStore: records are read straight from disk
+        for doc in index.get_by_ids(ids, namespace=namespace):
+            documents.append(Document(page_content=doc.page_content, metadata={**doc.metadata, "id": doc.id}))
+    else:
+        for start in range(0, len(ids), 100):
+            response = index.fetch(ids=ids[start : start + 100], namespace=namespace)
+            vectors = getattr(response, "vectors", None)
+            if vectors is None:
+                vectors = response.get("vectors", {})
+            for cid, record in vectors.items():
+                if isinstance(record, dict):
+                    metadata = dict(record.get("metadata") or {})
+                else:
+                    metadata = dict(record.metadata or {})
+                text = metadata.pop(text_key, "")
+                documents.append(Document(page_content=text, metadata={**metadata, "id": cid}))
+
+    pages = {cid: tuple(rng) for cid, rng in manifest[doc_key].get("pages", {}).items()}
+    documents.sort(key=lambda doc: (pages.get(doc.metadata["id"], (0, 0)), doc.metadata.get("char_start", 0)))
+    return documents
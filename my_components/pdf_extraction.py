@@ -0,0 +1,106 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _fitz():
+    """
+    PyMuPDF, imported on first use (None means pdfplumber-only fallback).
+    """
+    try:
+        import fitz
+    except ImportError:
+        return None
+    return fitz
+
+
+# Pages whose PyMuPDF output is split into this many blocks are treated as
+# layout-heavy (tables, multi-column) and re-read with pdfplumber
+LAYOUT_HEAVY_BLOCKS = 80
+
+
+# ✅ Function: Number of pages in a PDF
+def count_pages(file_path):
+    fitz = _fitz()
+    if fitz is not None:
+        with fitz.open(file_path) as doc:
+            return doc.page_count
+
+    import pdfplumber
+
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+# ✅ Function: Extract one page with pdfplumber (never returns None)
+def _plumber_pages(file_path, page_numbers):
+    import pdfplumber
+
+    texts = {}
+    with pdfplumber.open(file_path) as pdf:
+        for page_number in page_numbers:
+            texts[page_number] = pdf.pages[page_number - 1].extract_text() or ""
+    return texts
+
+
+# ✅ Function: Extract a range of pages (runs inside a worker process)
+def _extract_page_range(file_path, start, stop, layout_heavy_blocks=LAYOUT_HEAVY_BLOCKS):
+    """
+    Returns [(page_number, text), ...] for pages start..stop-1 (1-based).
+    PyMuPDF is used first; empty or layout-heavy pages fall back to pdfplumber.
+    """
+    fitz = _fitz()
+    if fitz is None:
+        texts = _plumber_pages(file_path, range(start, stop))
+        return [(n, texts[n]) for n in range(start, stop)]
+
+    results = []
+    fallback = []
+    with fitz.open(file_path) as doc:
+        for page_number in range(start, stop):
+            page = doc.load_page(page_number - 1)
+            text = page.get_text("text") or ""
+            if not text.strip() or len(page.get_text("blocks")) > layout_heavy_blocks:
+                fallback.append(page_number)
+            results.append((page_number, text))
+
+    if fallback:
+        try:
+            texts = _plumber_pages(file_path, fallback)
+        except ImportError:
+            texts = {}
+        results = [
+            (n, texts[n]) if texts.get(n, "").strip() else (n, text)
+            for n, text in results
+        ]
+    return results
+
+
+# ✅ Function: Stream (page_number, text) from a PDF using a process pool
+def iter_pdf_pages(file_path, workers=None, pages_per_task=16):
+    """
+    Yields (page_number, text) in page order. Page ranges are extracted in
+    parallel worker processes; small PDFs are read in the current process.
+    """
+    total = count_pages(file_path)
+    ranges = [
+        (start, min(start + pages_per_task, total + 1))
+        for start in range(1, total + 1, pages_per_task)
+    ]
+
+    if len(ranges) <= 1 or workers == 1:
+        for start, stop in ranges:
+            yield from _extract_page_range(file_path, start, stop)
+        return
+
+    workers = min(workers or os.cpu_count() or 1, len(ranges))
+    # spawn: safe when called from a thread (lecture_pipeline, notebooks)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        page_batches = pool.map(
+            _extract_page_range,
+            [file_path] * len(ranges),
+            [start for start, _ in ranges],
+            [stop for _, stop in ranges],
+        )
+        for batch in page_batches:
+            yield from batch
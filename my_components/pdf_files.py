@@ -4,6 +4,11 @@ def save_to_simple_pdf(filename="query_result.pdf"):
     final_result = run_llm("pdf", instructions=task_instruction)
 
     # Step 2: Create PDF
+    return write_answer_pdf(final_result, filename)
+
+
+# 🔹 Write an already generated answer as a PDF
+def write_answer_pdf(final_result, filename="query_result.pdf"):
     doc = SimpleDocTemplate(filename, pagesize=A4)
     styles = getSampleStyleSheet()
     story = []
@@ -23,11 +28,13 @@ def save_to_simple_pdf(filename="query_result.pdf"):
 
     doc.build(story)
     print(f"✅ PDF saved: {filename}")
+    return filename
 
 
-# 🔹 Usage
-my_file = input("Enter the name of your file: ")
-# task_instruction = "extract the text from page number 3 of given pdf..."
-save_to_simple_pdf(
-    f"../my_pdf_files/{my_file}.pdf",
-)
+# 🔹 Usage (interactive; lecture_pipeline.py takes file names from its manifest)
+if __name__ == "__main__":
+    my_file = input("Enter the name of your file: ")
+    # task_instruction = "extract the text from page number 3 of given pdf..."
+    save_to_simple_pdf(
+        f"../my_pdf_files/{my_file}.pdf",
+    )
@@ -1,19 +1,34 @@
+from ingestion_manifest import (
+    chunk_id,
+    document_key,
+    load_manifest,
+    save_manifest,
+    diff_chunks,
+    record_document,
+    manifest_lock,
+)
+from pdf_extraction import iter_pdf_pages
+from page_index import build_page_documents
+from batch_ingest import (
+    embed_and_upsert,
+    pinecone_upserter,
+    missing_ids,
+    wait_for_ids,
+)
+
 # === Step 1: Extract text from PDF ===
 def Extract_ext_from_PDF(file_path):
-    pdf_text = ""
-
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            pdf_text += page.extract_text() + "\n"
-
-    return pdf_text
+    # ✅ Pages are streamed from a process pool (PyMuPDF, pdfplumber fallback)
+    return "\n".join(text for _, text in iter_pdf_pages(file_path)) + "\n"
 
 
-pdf_text = Extract_ext_from_PDF(file_path)
+# Keep page numbers so chunks can be traced back to their pages
+if __name__ == "__main__":
+    pdf_pages = list(iter_pdf_pages(file_path))
 
 
 # === Step 2: Create chunker with overlap ===
-def chunk_and_overlap(c_size, c_overlap):
+def chunk_and_overlap(c_size, c_overlap, my_pages=None, my_source=file_path, my_show=True):
     text_splitter = CharacterTextSplitter(
         separator="\n",  # split by newlines
         chunk_size=c_size,  # max characters per chunk
@@ -21,30 +36,41 @@ def chunk_and_overlap(c_size, c_overlap):
         length_function=len,
     )
 
-    chunks = text_splitter.split_text(pdf_text)
+    # ✅ Each chunk carries source, page_start, page_end, char_start, char_end
+    chunks = build_page_documents(
+        pdf_pages if my_pages is None else my_pages, text_splitter, my_source
+    )
 
     # === Step 3: Show result ===
-    for i, chunk in enumerate(chunks, start=1):  # first 5 chunks
-        print(f"--- Chunk {i} ---")
-        print(chunk)
+    for i, chunk in enumerate(chunks if my_show else [], start=1):  # first 5 chunks
+        meta = chunk.metadata
+        print(f"--- Chunk {i} (pages {meta['page_start']}-{meta['page_end']}) ---")
+        print(chunk.page_content)
         print()
     return chunks
 
 
-chunks = chunk_and_overlap(700, 100)
+if __name__ == "__main__":
+    chunks = chunk_and_overlap(700, 100)
 
 
-def generating_embeddings(my_model, my_pc_Api):
+def generating_embeddings(my_model, my_pc_Api, my_cache=embedding_cache_path):
 
     embeddings = GoogleGenerativeAIEmbeddings(
         model=my_model, pinecone_api_key=my_pc_Api
     )
+    # ✅ Identical chunks and queries are served from the local cache
+    if my_cache:
+        from embedding_cache import CachedEmbeddings
+
+        embeddings = CachedEmbeddings(embeddings, my_cache, model_name=my_model)
     return embeddings
 
 
-embeddings = generating_embeddings(
-    gemini_model_for_embaddings, os.environ["PINECONE_API_KEY"]
-)
+if __name__ == "__main__":
+    embeddings = generating_embeddings(
+        gemini_model_for_embaddings, os.environ["PINECONE_API_KEY"]
+    )
 
 # Creating index
 
@@ -71,36 +97,102 @@ def creating_Index(my_pc, my_IN):
     return pc
 
 
-pc = creating_Index(Pinecone(os.environ["PINECONE_API_KEY"]), Index_name)
+# The local backend needs no remote index
+pc = None
+if __name__ == "__main__" and vector_store_backend == "pinecone":
+    pc = creating_Index(Pinecone(os.environ["PINECONE_API_KEY"]), Index_name)
 
 
 # Embed and upsert each chunk as a distinct record in a namespace called myproaiNamespace
-def distinct_record(my_ns, my_IN):
-
-    documents = [Document(page_content=chunk) for chunk in chunks]
+# Only chunks that are new since the last run are embedded (see ingestion_manifest.py)
+def distinct_record(
+    my_ns,
+    my_IN,
+    my_source=file_path,
+    my_manifest=ingestion_manifest_path,
+    my_batch_size=upsert_batch_size,
+    my_workers=upsert_workers,
+):
 
     # Assign unique but repeatable IDs (hash from text)
-    ids = [hashlib.md5(doc.page_content.encode()).hexdigest() for doc in documents]
+    ids = [chunk_id(chunk.page_content) for chunk in chunks]
+
+    manifest = load_manifest(my_manifest)
+    doc_key = document_key(my_IN, my_ns, my_source, vector_store_backend, local_vector_store_path)
+    new_ids, stale_ids = diff_chunks(manifest, doc_key, ids)
+
+    if vector_store_backend == "local":
+        # ✅ Offline backend: vectors stay in a memory-mapped file on this machine
+        from local_vector_store import LocalVectorStore
+
+        docsearch = LocalVectorStore(embeddings, local_vector_store_path, namespace=my_ns)
+        store = docsearch
+        upsert_batch = docsearch.upserter(my_ns)
+        delete_batch = lambda batch: docsearch.delete(ids=batch, namespace=my_ns, flush=False)
+    else:
+        index = pc.Index(my_IN)
+        store = index
+        upsert_batch = pinecone_upserter(index, my_ns)
+        delete_batch = lambda batch: index.delete(ids=batch, namespace=my_ns)
+
+    # ✅ Chunks the manifest lists but the store lost (wiped index, deleted folder) are embedded again
+    new_set = set(new_ids)
+    lost = set(missing_ids(store, my_ns, [cid for cid in ids if cid not in new_set]))
+    if lost:
+        print(f"⚠️ {len(lost)} recorded chunks are missing from the store, re-embedding them")
+        new_ids = [cid for cid in dict.fromkeys(ids) if cid in new_set or cid in lost]
+
+    # ✅ Embed and upsert only chunks we have never seen before, in concurrent batches
+    chunk_by_id = dict(zip(ids, chunks))
+    if new_ids:
+        documents = [chunk_by_id[cid] for cid in new_ids]
+        embed_and_upsert(
+            documents,
+            new_ids,
+            embeddings,
+            upsert_batch,
+            batch_size=my_batch_size,
+            max_workers=my_workers,
+        )
+    print(f"🧩 {len(new_ids)} new chunks embedded, {len(ids) - len(new_ids)} reused")
+
+    # ✅ Remove vectors whose chunks disappeared from the document
+    if stale_ids:
+        for start in range(0, len(stale_ids), 1000):
+            delete_batch(stale_ids[start : start + 1000])
+        print(f"🗑️ Deleted {len(stale_ids)} stale chunks")
+
+    # ✅ Re-read under the lock so concurrent ingests of other PDFs are kept
+    page_ranges = [(c.metadata["page_start"], c.metadata["page_end"]) for c in chunks]
+    with manifest_lock(my_manifest):
+        manifest = record_document(load_manifest(my_manifest), doc_key, ids, page_ranges)
+        save_manifest(manifest, my_manifest)
+
+    if vector_store_backend == "local":
+        # ✅ All batches and deletions are written to disk once
+        docsearch.flush(my_ns)
+        print(f"Local store after upsert: {docsearch.count(my_ns)} vectors")
+        return docsearch
+
+    # ✅ Wait for the index to actually reflect the changes
+    if new_ids or stale_ids:
+        wait_for_ids(index, my_ns, upserted_ids=new_ids, deleted_ids=stale_ids)
+
+    # See how many vectors have been upserted
+    print("Index after upsert:")
+    print(index.describe_index_stats())
+    print("\n")
 
-    docsearch = PineconeVectorStore.from_documents(
-        documents=documents,
+    docsearch = PineconeVectorStore(
         index_name=my_IN,
         embedding=embeddings,
         namespace=my_ns,
-        ids=ids,
     )
-
-    time.sleep(5)
-
-    # See how many vectors have been upserted
-    print("Index after upsert:")
-    print(pc.Index(Index_name).describe_index_stats())
-    print("\n")
-    time.sleep(2)
     return docsearch
 
 
-docsearch = distinct_record("myproaivectors", Index_name)
+if __name__ == "__main__":
+    docsearch = distinct_record("myproaivectors", Index_name)
 
 
 def checking_records(my_IN, my_ns):
@@ -119,4 +211,5 @@ def checking_records(my_IN, my_ns):
         print("\n")
 
 
-checking_records(Index_name, "myproaivectors")
+if __name__ == "__main__" and vector_store_backend == "pinecone":
+    checking_records(Index_name, "myproaivectors")
@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import hashlib
+
+from audio_buffer import AudioBuffer
+from ingestion_manifest import load_manifest, save_manifest, manifest_lock
+
+
+DEFAULT_SEGMENT_CACHE_DIR = r"../video_lectures/segment_cache"
+# Bump when the slide layout or encoding pipeline changes, so old segments are not reused
+RENDER_VERSION = 1
+# Segments unused for this long are deleted, then the least recently used beyond the size cap
+DEFAULT_MAX_AGE_DAYS = 30
+DEFAULT_MAX_BYTES = 5 * 1024**3
+
+
+# ✅ Function: Hash of a segment's narration (samples or file bytes)
+def audio_fingerprint(audio):
+    digest = hashlib.sha256()
+    if isinstance(audio, AudioBuffer):
+        digest.update(str(audio.sample_rate).encode())
+        digest.update(audio.samples.tobytes())
+    else:
+        with open(audio, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+# ✅ Function: Fingerprint of everything that ends up in one encoded segment
+def segment_fingerprint(job):
+    """
+    Covers the slide layout (title, headings, highlighted heading), the timed
+    captions, the narration and the render settings; any change gives a new
+    fingerprint and therefore a fresh render.
+    """
+    payload = {
+        "version": RENDER_VERSION,
+        "title": job["title"],
+        "headings": list(job["headings"]),
+        "highlight_index": job["highlight_index"],
+        "captions": [[round(start, 4), round(end, 4), text] for start, end, text in job["captions"]],
+        "audio": audio_fingerprint(job["audio"]),
+        "fps": job.get("fps", 24),
+        "preset": job.get("preset", "veryfast"),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# ✅ Class: Encoded segments kept between runs, keyed by fingerprint
+class RenderManifest:
+    """
+    <cache_dir>/<fingerprint>.mp4 plus <cache_dir>/manifest.json recording
+    when each segment was rendered and last used. prune() drops the segments
+    no lecture has used for max_age_days and caps the folder at max_bytes.
+    save() and prune() hold a lock file and merge with what other lectures
+    wrote in the meantime, so concurrent renders keep each other's entries.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_SEGMENT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, "manifest.json")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries = load_manifest(self.path)
+
+    def segment_path(self, fingerprint):
+        return os.path.join(self.cache_dir, f"{fingerprint}.mp4")
+
+    def lookup(self, fingerprint):
+        """
+        Returns the encoded segment file, or None if it has to be rendered.
+        """
+        path = self.segment_path(fingerprint)
+        if fingerprint not in self.entries or not os.path.exists(path):
+            return None
+        self.entries[fingerprint]["last_used"] = time.time()
+        return path
+
+    def record(self, fingerprint, label=""):
+        now = time.time()
+        self.entries[fingerprint] = {"label": label, "rendered": now, "last_used": now}
+
+    def _merge(self):
+        # Call with the lock held: the file on disk plus our newer entries
+        merged = load_manifest(self.path)
+        for fingerprint, entry in self.entries.items():
+            if not os.path.exists(self.segment_path(fingerprint)):
+                continue  # pruned by another run
+            current = merged.get(fingerprint)
+            if current is None or entry.get("last_used", 0) >= current.get("last_used", 0):
+                merged[fingerprint] = entry
+        self.entries = merged
+
+    def save(self):
+        with manifest_lock(self.path):
+            self._merge()
+            save_manifest(self.entries, self.path)
+
+    def prune(self, max_age_days=DEFAULT_MAX_AGE_DAYS, max_bytes=DEFAULT_MAX_BYTES):
+        with manifest_lock(self.path):
+            self._merge()
+            cutoff = time.time() - max_age_days * 24 * 3600
+            by_age = sorted(self.entries.items(), key=lambda item: item[1].get("last_used", 0))
+            doomed = [fingerprint for fingerprint, entry in by_age if entry.get("last_used", 0) < cutoff]
+
+            if max_bytes is not None:
+                kept = [fingerprint for fingerprint, _ in by_age if fingerprint not in doomed]
+                sizes = {}
+                for fingerprint in kept:
+                    try:
+                        sizes[fingerprint] = os.path.getsize(self.segment_path(fingerprint))
+                    except FileNotFoundError:
+                        sizes[fingerprint] = 0
+                total = sum(sizes.values())
+                for fingerprint in kept:  # least recently used first
+                    if total <= max_bytes:
+                        break
+                    doomed.append(fingerprint)
+                    total -= sizes[fingerprint]
+
+            for fingerprint in doomed:
+                try:
+                    os.remove(self.segment_path(fingerprint))
+                except FileNotFoundError:
+                    pass
+                del self.entries[fingerprint]
+            save_manifest(self.entries, self.path)
+        if doomed:
+            print(f"🧹 Removed {len(doomed)} unused segments from {self.cache_dir}")
+        return doomed
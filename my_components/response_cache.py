@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+
+
+# ✅ Function: Hash of a system prompt (prompts are long, keys should not be)
+def prompt_hash(system_prompt):
+    return hashlib.sha256(str(system_prompt).encode("utf-8")).hexdigest()
+
+
+# ✅ Function: Scope = everything except the wording of the instruction
+def response_scope(mode, system_prompt, model, chunk_ids):
+    payload = json.dumps(
+        [mode, prompt_hash(system_prompt), model, sorted(set(chunk_ids))]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ✅ Function: Exact cache key for one run_llm call
+def response_key(mode, system_prompt, instruction, model, chunk_ids):
+    scope = response_scope(mode, system_prompt, model, chunk_ids)
+    return hashlib.sha256(f"{scope}\n{instruction}".encode("utf-8")).hexdigest()
+
+
+# ✅ Class: Persistent LLM response cache with TTL and LRU eviction
+class ResponseCache:
+    """
+    Stores final LLM answers in SQLite. Entries expire after ttl_seconds and
+    the least recently used ones are dropped beyond max_entries.
+
+    Because the key includes the IDs (content hashes) of the retrieved chunks,
+    editing the source document changes the key and the old answer is simply
+    never hit again.
+    """
+
+    def __init__(self, cache_path, ttl_seconds=7 * 24 * 3600, max_entries=2000):
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def _db(self):
+        # Opened on first use, so creating the cache at import time costs nothing
+        if self._conn is None:
+            with self._open_lock:
+                if self._conn is None:
+                    folder = os.path.dirname(self.cache_path)
+                    if folder:
+                        os.makedirs(folder, exist_ok=True)
+
+                    db = sqlite3.connect(self.cache_path, check_same_thread=False)
+                    db.execute("PRAGMA journal_mode=WAL")
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS responses ("
+                        " key TEXT PRIMARY KEY,"
+                        " scope TEXT NOT NULL,"
+                        " response TEXT NOT NULL,"
+                        " query_vector BLOB,"
+                        " created REAL NOT NULL,"
+                        " last_used REAL NOT NULL)"
+                    )
+                    db.execute("CREATE INDEX IF NOT EXISTS responses_scope ON responses(scope)")
+                    db.commit()
+                    self._conn = db
+        return self._conn
+
+    def _expired(self, created, now):
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def _touch(self, key, now):
+        self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[1], now):
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._touch(key, now)
+            return row[0]
+
+    def get_similar(self, scope, query_vector, threshold=0.97):
+        """
+        Near-duplicate lookup: an answer for the same mode/prompt/model/chunks
+        whose instruction embedding is at least `threshold` cosine-similar.
+        The stored vectors are stacked and scored with one matrix product;
+        only the best answer's text is read.
+        """
+        import numpy as np
+
+        now = time.time()
+        query = np.asarray(query_vector, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        if not query.size or not query_norm:
+            return None
+        oldest = now - self.ttl_seconds if self.ttl_seconds is not None else float("-inf")
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, query_vector FROM responses"
+                " WHERE scope = ? AND query_vector IS NOT NULL AND created >= ?"
+                " AND length(query_vector) = ?",
+                (scope, oldest, query.nbytes),
+            ).fetchall()
+            if not rows:
+                return None
+            vectors = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32)
+            vectors = vectors.reshape(len(rows), query.size)
+            norms = np.linalg.norm(vectors, axis=1) * query_norm
+            scores = np.divide(vectors @ query, norms, out=np.zeros(len(rows), dtype=np.float32), where=norms > 0)
+            best = int(np.argmax(scores))
+            if scores[best] < threshold:
+                return None
+            best_key = rows[best][0]
+            row = self._db.execute("SELECT response FROM responses WHERE key = ?", (best_key,)).fetchone()
+            if row is None:
+                return None
+            self._touch(best_key, now)
+        return row[0]
+
+    def put(self, key, scope, response, query_vector=None):
+        now = time.time()
+        blob = array("f", query_vector).tobytes() if query_vector is not None else None
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (key, scope, response, query_vector, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, scope, response, blob, now, now),
+            )
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now):
+        if self.ttl_seconds is not None:
+            self._db.execute(
+                "DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)
+            )
+        if self.max_entries is not None:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
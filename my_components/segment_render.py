@@ -0,0 +1,124 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from audio_buffer import AudioBuffer
+from video_encoder import encode_stills, concat_segments
+from render_manifest import segment_fingerprint
+
+# One renderer per worker process, created on first use
+_renderer = None
+
+
+def _slide_renderer():
+    global _renderer
+    if _renderer is None:
+        from slide_renderer import SlideRenderer
+
+        _renderer = SlideRenderer()
+    return _renderer
+
+
+# ✅ Function: Encode one heading segment to its own file (runs in a worker process)
+def render_segment(job):
+    """
+    job: {"title", "headings", "highlight_index", "captions", "audio",
+    "output_file", "fps", "preset", "threads"}. "audio" is an AudioBuffer or
+    any audio file ffmpeg can read. Returns job["output_file"].
+    """
+    renderer = _slide_renderer()
+    output_file = job["output_file"]
+
+    audio = job["audio"]
+    audio_path = audio
+    if isinstance(audio, AudioBuffer):
+        audio_path = f"{os.path.splitext(output_file)[0]}.wav"
+        audio.write_wav(audio_path)
+
+    stills = (
+        (renderer.frame(job["title"], job["headings"], job["highlight_index"], text), end - start)
+        for start, end, text in job["captions"]
+    )
+    try:
+        encode_stills(
+            stills,
+            output_file,
+            audio_path,
+            fps=job.get("fps", 24),
+            preset=job.get("preset", "veryfast"),
+            threads=job.get("threads", 1),
+        )
+    finally:
+        if audio_path is not audio:
+            os.remove(audio_path)
+    return output_file
+
+
+# ✅ Function: Render segments on every core, then join them without re-encoding
+def render_segments(jobs, output_file, workers=None, segment_dir=None, keep_segments=False, manifest=None):
+    """
+    Each job becomes <segment_dir>/segment_00001.mp4 in a process pool; the
+    files are then joined with the ffmpeg concat demuxer (-c copy). Only one
+    segment per worker is in memory at a time. x264 threads are split between
+    workers so the pool does not oversubscribe the CPU.
+
+    With a RenderManifest, segments live in its cache folder under their
+    fingerprint, and segments whose inputs did not change are reused instead
+    of being rendered again.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        raise ValueError("No segments to render")
+
+    segment_dir = segment_dir or f"{os.path.splitext(output_file)[0]}_segments"
+    segment_files = []
+    todo = []
+    pending = {}  # Identical segments within one lecture are rendered once
+    for i, job in enumerate(jobs, start=1):
+        if manifest is None:
+            os.makedirs(segment_dir, exist_ok=True)
+            path = job.setdefault("output_file", os.path.join(segment_dir, f"segment_{i:05d}.mp4"))
+        else:
+            fingerprint = segment_fingerprint(job)
+            path = manifest.lookup(fingerprint) or pending.get(fingerprint)
+            if path is not None:
+                segment_files.append(path)
+                continue
+            pending[fingerprint] = manifest.segment_path(fingerprint)
+            path = job.setdefault("output_file", manifest.segment_path(fingerprint))
+            job["fingerprint"] = fingerprint
+        segment_files.append(path)
+        todo.append(job)
+
+    if manifest is not None:
+        print(f"♻️ {len(jobs) - len(todo)}/{len(jobs)} segments reused from earlier renders")
+        # Reused segments are marked as used right away, so a concurrent prune keeps them
+        manifest.save()
+
+    if todo:
+        workers = workers or os.cpu_count() or 1
+        workers = max(1, min(workers, len(todo)))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        for job in todo:
+            job.setdefault("threads", threads)
+
+        print(f"🧩 Rendering {len(todo)} segments with {workers} worker processes...")
+        # spawn: safe when called from a thread (lecture_pipeline, notebooks)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for i, (job, path) in enumerate(zip(todo, pool.map(render_segment, todo)), start=1):
+                print(f"    ✅ Segment {i}/{len(todo)} ready: {path}")
+                if manifest is not None:
+                    manifest.record(job["fingerprint"], f"{job['title']} / {job['headings'][job['highlight_index']]}")
+                    # Saved as we go, so an interrupted run keeps what it finished
+                    manifest.save()
+
+    print(f"🔗 Joining {len(segment_files)} segments (stream copy)...")
+    concat_segments(segment_files, output_file)
+    if manifest is not None:
+        manifest.save()
+    elif not keep_segments:
+        for path in segment_files:
+            os.remove(path)
+        if not os.listdir(segment_dir):
+            os.rmdir(segment_dir)
+    return output_file
@@ -0,0 +1,194 @@
+import re
+import ast
+import json
+
+
+# Keys the "text" prompt shows unquoted, e.g.  slide1: {   or   , keypoint2:
+_UNQUOTED_KEY = re.compile(r"([{,]\s*)([A-Za-z_][\w \-]*?)\s*:")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _map_outside_strings(text, fn):
+    """
+    Apply fn to every part of text that is not inside a "double quoted" string.
+    """
+    out = []
+    segment_start = 0
+    i = 0
+    while i < len(text):
+        if text[i] == '"':
+            out.append(fn(text[segment_start:i]))
+            j = i + 1
+            while j < len(text) and text[j] != '"':
+                j += 2 if text[j] == "\\" else 1
+            out.append(text[i : j + 1])
+            i = segment_start = j + 1
+        else:
+            i += 1
+    out.append(fn(text[segment_start:]))
+    return "".join(out)
+
+
+def _repair_segment(segment):
+    segment = _UNQUOTED_KEY.sub(lambda m: f'{m.group(1)}"{m.group(2).strip()}":', segment)
+    segment = _TRAILING_COMMA.sub(r"\1", segment)
+    return re.sub(r"\b(True|False|None)\b", lambda m: _PY_LITERALS[m.group(1)], segment)
+
+
+# ✅ Function: Fix the usual LLM JSON defects
+def repair_json(text):
+    """
+    Quotes bare keys, drops trailing commas and converts Python literals.
+    String contents are never touched.
+    """
+    return _map_outside_strings(text, _repair_segment)
+
+
+# ✅ Function: json.loads that tolerates common defects
+def loads_lenient(text):
+    try:
+        return json.loads(text, strict=False)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(repair_json(text), strict=False)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return None
+
+
+# ✅ Class: Incremental parser that emits each slide as soon as it is complete
+class SlideStreamParser:
+    """
+    Feed it the model output piece by piece; feed() returns the
+    (slide_name, slide_dict) pairs whose closing brace arrived in that piece.
+    close() salvages a truncated last slide (complete key/value pairs only).
+    Text before the first "{" (topic line, ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.slides = {}
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._slide_start = None
+        self._last_pair_end = None
+
+    def _slide_name(self, slide_start):
+        before = self.buffer[max(0, slide_start - 300) : slide_start]
+        match = re.search(r'"([^"]*)"\s*:\s*$', before) or re.search(
+            r"([A-Za-z_][\w \-]*?)\s*:\s*$", before
+        )
+        return match.group(1).strip() if match else f"slide{len(self.slides) + 1}"
+
+    def _emit(self, slide_text, slide_start):
+        slide = loads_lenient(slide_text)
+        if not isinstance(slide, dict):
+            print(f"⚠️ Could not parse slide starting at char {slide_start}")
+            return []
+        name = self._slide_name(slide_start)
+        self.slides[name] = slide
+        return [(name, slide)]
+
+    def feed(self, piece):
+        self.buffer += piece
+        completed = []
+        buffer = self.buffer
+
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+            if self._depth < 0:
+                break
+            if self._depth == 0:
+                # Prose before the JSON: only look for the opening brace
+                if ch == "{":
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+                if self._depth == 2:
+                    self._slide_start = i
+                    self._last_pair_end = None
+            elif ch == "," and self._depth == 2:
+                self._last_pair_end = i
+            elif ch == "}":
+                if self._depth == 2 and self._slide_start is not None:
+                    completed += self._emit(buffer[self._slide_start : i + 1], self._slide_start)
+                    self._slide_start = None
+                self._depth -= 1
+                if self._depth == 0:
+                    # Outer object closed; anything after it is trailing prose
+                    self._depth = -1
+
+        self._pos = len(buffer)
+        return completed
+
+    def close(self):
+        """
+        Call once the stream ends. Returns the salvaged truncated slide, if any.
+        """
+        if self._slide_start is None or self._last_pair_end is None:
+            return []
+        print("⚠️ Output was truncated, keeping the complete part of the last slide")
+        text = self.buffer[self._slide_start : self._last_pair_end] + "}"
+        start = self._slide_start
+        self._slide_start = None
+        return self._emit(text, start)
+
+
+# ✅ Function: Yield (slide_name, slide_dict) from streamed text
+def iter_slides(chunks):
+    parser = SlideStreamParser()
+    for piece in chunks:
+        yield from parser.feed(piece)
+    yield from parser.close()
+
+
+# ✅ Function: Extract valid JSON from LLM output and parse it safely
+def clean_and_parse_json(text_output):
+    """
+    Parses the whole slide JSON (keeping non-slide keys such as "topic").
+    Falls back to slide-by-slide parsing, so one bad slide or a truncated end
+    no longer loses the whole result.
+    """
+    if not text_output:
+        print("❌ No JSON object found in text. Returning None.")
+        return None
+
+    start = text_output.find("{")
+    end = text_output.rfind("}")
+    if start < 0:
+        print("❌ No JSON object found in text. Returning None.")
+        return None
+
+    if end > start:
+        parsed = loads_lenient(text_output[start : end + 1])
+        if isinstance(parsed, dict):
+            print("✅ JSON parsed successfully")
+            return parsed
+
+    parser = SlideStreamParser()
+    parser.feed(text_output)
+    parser.close()
+    if parser.slides:
+        print(f"⚠️ JSON repaired slide by slide ({len(parser.slides)} slides recovered)")
+        return parser.slides
+
+    print("❌ JSON parsing failed")
+    return None
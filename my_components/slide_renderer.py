@@ -0,0 +1,154 @@
+from bisect import bisect_right
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+
+VIDEO_SIZE = (1280, 720)
+BACKGROUND_COLOR = (20, 20, 40)
+BORDER_COLOR = (40, 40, 60)
+TITLE_COLOR = (255, 255, 255)
+HIGHLIGHT_COLOR = (255, 255, 0)
+HEADING_COLOR = (211, 211, 211)  # lightgray
+CAPTION_COLOR = (255, 255, 0)
+CAPTION_BOX = (90, 550, 1100, 150)  # x, y, width, height
+
+_FONT_FILES = {
+    True: ["arialbd.ttf", "Arial Bold.ttf", "DejaVuSans-Bold.ttf", "LiberationSans-Bold.ttf"],
+    False: ["arial.ttf", "Arial.ttf", "DejaVuSans.ttf", "LiberationSans-Regular.ttf"],
+}
+
+
+# ✅ Function: Arial (or the closest installed font) at a given size
+@lru_cache(maxsize=None)
+def load_font(size, bold=False):
+    for name in _FONT_FILES[bold]:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def _wrap(text, font, max_width):
+    lines = []
+    line = ""
+    for word in text.split():
+        candidate = f"{line} {word}".strip()
+        if line and font.getlength(candidate) > max_width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines
+
+
+def _draw_centered(draw, text, y, font, color, width):
+    text_width = draw.textlength(text, font=font)
+    draw.text(((width - text_width) / 2, y), text, font=font, fill=color)
+
+
+# ✅ Class: Slide frames rasterized once with Pillow
+class SlideRenderer:
+    """
+    Draws the static slide (background, border, title, headings with the
+    current one highlighted) once per (slide, highlighted heading), and every
+    caption once as an RGB + alpha overlay. A frame is the cached slide with
+    only the caption box blended in, and identical frames are reused, so
+    make_frame does no drawing while a caption stays on screen.
+    """
+
+    def __init__(self, size=VIDEO_SIZE, max_frames=8):
+        self.size = size
+        self.max_frames = max_frames
+        self._slides = {}
+        self._captions = {}
+        self._frames = OrderedDict()
+
+    def slide_image(self, title, headings, highlight_index):
+        key = (title, tuple(headings), highlight_index)
+        if key in self._slides:
+            return self._slides[key]
+
+        width, height = self.size
+        image = Image.new("RGB", self.size, BACKGROUND_COLOR)
+        draw = ImageDraw.Draw(image)
+        draw.rectangle([10, 10, width - 11, height - 11], fill=BORDER_COLOR)
+
+        y_position = 50
+        _draw_centered(draw, title, y_position, load_font(40, bold=True), TITLE_COLOR, width)
+        y_position += 80
+        for idx, heading in enumerate(headings):
+            if idx == highlight_index:
+                font, color = load_font(36, bold=True), HIGHLIGHT_COLOR
+            else:
+                font, color = load_font(32), HEADING_COLOR
+            _draw_centered(draw, heading, y_position, font, color, width)
+            y_position += 60
+
+        self._slides[key] = np.asarray(image, dtype=np.uint8)
+        return self._slides[key]
+
+    def caption_overlay(self, text):
+        """
+        Returns (rgb, alpha) for the caption box; alpha is float32 in [0, 1].
+        """
+        if text in self._captions:
+            return self._captions[text]
+
+        _, _, box_width, box_height = CAPTION_BOX
+        font = load_font(28, bold=True)
+        mask = Image.new("L", (box_width, box_height), 0)
+        draw = ImageDraw.Draw(mask)
+
+        lines = _wrap(text, font, box_width)
+        line_height = int(font.size * 1.25) if hasattr(font, "size") else 16
+        y_position = max(0, (box_height - line_height * len(lines)) // 2)
+        for line in lines:
+            _draw_centered(draw, line, y_position, font, 255, box_width)
+            y_position += line_height
+
+        alpha = (np.asarray(mask, dtype=np.float32) / 255.0)[..., None]
+        rgb = np.empty((box_height, box_width, 3), dtype=np.float32)
+        rgb[:] = CAPTION_COLOR
+        self._captions[text] = (rgb, alpha)
+        return self._captions[text]
+
+    def frame(self, title, headings, highlight_index, caption=""):
+        key = (title, tuple(headings), highlight_index, caption)
+        if key in self._frames:
+            self._frames.move_to_end(key)
+            return self._frames[key]
+
+        frame = self.slide_image(title, headings, highlight_index)
+        if caption:
+            frame = frame.copy()
+            x, y, box_width, box_height = CAPTION_BOX
+            rgb, alpha = self.caption_overlay(caption)
+            region = frame[y : y + box_height, x : x + box_width]
+            region[:] = (region * (1.0 - alpha) + rgb * alpha).astype(np.uint8)
+
+        self._frames[key] = frame
+        if len(self._frames) > self.max_frames:
+            self._frames.popitem(last=False)
+        return frame
+
+    def segment_clip(self, title, headings, highlight_index, captions, duration):
+        """
+        MoviePy clip for one heading. captions is a list of
+        (start_seconds, end_seconds, text) in time order.
+        """
+        from moviepy.editor import VideoClip
+
+        starts = [start for start, _, _ in captions]
+
+        def make_frame(t):
+            i = bisect_right(starts, t) - 1
+            caption = captions[i][2] if i >= 0 and t < captions[i][1] else ""
+            return self.frame(title, headings, highlight_index, caption)
+
+        return VideoClip(make_frame, duration=duration)
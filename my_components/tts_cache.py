@@ -0,0 +1,177 @@
+import io
+import os
+import time
+import wave
+import sqlite3
+import hashlib
+import threading
+
+
+DEFAULT_TTS_CACHE_DIR = r"../my_audios/tts_cache"
+
+
+# ✅ Function: Same text modulo whitespace -> same cache entry
+def normalize_text(text):
+    return " ".join(str(text).split())
+
+
+# ✅ Function: Cache key for one piece of narration
+def tts_cache_key(backend, voice, speed, lang, text):
+    payload = "\n".join(
+        [backend, str(voice), str(speed), str(lang), normalize_text(text)]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ✅ Function: float samples -> 16-bit PCM WAV bytes
+def encode_wav(samples, sample_rate):
+    import numpy as np
+
+    pcm = (np.clip(np.asarray(samples, dtype=np.float32), -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+# ✅ Function: 16-bit PCM WAV bytes -> (float32 samples, sample_rate)
+def decode_wav(data):
+    import numpy as np
+
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        sample_rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    return np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32767, sample_rate
+
+
+# ✅ Class: Content-addressed TTS audio cache shared by gTTS and Kokoro
+class TTSCache:
+    """
+    Encoded audio is stored as <folder>/<key>.<ext>, indexed in SQLite with its
+    duration and size. Keys come from tts_cache_key(backend, voice, speed,
+    language, text), so unchanged paragraphs are never synthesized twice.
+    The least recently used files are deleted once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, folder=DEFAULT_TTS_CACHE_DIR, max_bytes=1024 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def _db(self):
+        # Opened on first use, so creating the cache at import time costs nothing
+        if self._conn is None:
+            with self._open_lock:
+                if self._conn is None:
+                    os.makedirs(self.folder, exist_ok=True)
+                    db = sqlite3.connect(os.path.join(self.folder, "index.sqlite"), check_same_thread=False)
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS audio ("
+                        " key TEXT PRIMARY KEY,"
+                        " ext TEXT NOT NULL,"
+                        " duration REAL NOT NULL,"
+                        " size INTEGER NOT NULL,"
+                        " last_used REAL NOT NULL)"
+                    )
+                    db.commit()
+                    self._conn = db
+        return self._conn
+
+    def _path(self, key, ext):
+        return os.path.join(self.folder, f"{key}.{ext}")
+
+    def get(self, key):
+        """
+        Returns (audio_bytes, duration_seconds) or None.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT ext, duration FROM audio WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            path = self._path(key, row[0])
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                self._db.execute("DELETE FROM audio WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE audio SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return data, row[1]
+
+    def put(self, key, data, duration, ext):
+        self._db  # creates the folder on first use
+        path = self._path(key, ext)
+        tmp_path = f"{path}.tmp{threading.get_ident()}"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO audio (key, ext, duration, size, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, ext, duration, len(data), time.time()),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM audio").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, ext, size in self._db.execute(
+            "SELECT key, ext, size FROM audio ORDER BY last_used ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key, ext))
+            except FileNotFoundError:
+                pass
+            self._db.execute("DELETE FROM audio WHERE key = ?", (key,))
+            total -= size
+
+
+# ✅ Class: Audio bytes served from the cache (no need to store them again)
+class CachedAudio(bytes):
+    from_cache = True
+
+
+# ✅ Function: Wrap a text -> bytes synthesizer with the cache
+def cached_synthesizer(synthesize, cache, backend, voice, speed, lang, ext, duration_fn):
+    """
+    Returns synthesize(text) that first looks in the cache; hits come back as
+    CachedAudio. Fresh audio is not stored by the wrapper itself: the caller
+    checks it first and then calls wrapper.store(text, data, duration)
+    (tts_scheduler does this for audio that is not from_cache), so a truncated
+    or empty response never ends up in the cache. duration_fn(bytes) measures
+    the audio when store() gets no duration. wrapper.key(text) is the cache
+    key, for naming files after their content.
+    """
+    if cache is None:
+        return synthesize
+
+    def key(text):
+        return tts_cache_key(backend, voice, speed, lang, text)
+
+    def wrapper(text):
+        hit = cache.get(key(text))
+        if hit is not None and hit[1] > 0:
+            return CachedAudio(hit[0])
+        return synthesize(text)
+
+    def store(text, data, duration=None):
+        duration = duration_fn(data) if duration is None else duration
+        cache.put(key(text), data, duration, ext)
+
+    wrapper.key = key
+    wrapper.store = store
+    return wrapper
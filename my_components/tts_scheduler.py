@@ -0,0 +1,105 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+
+_BITRATES = {
+    # (mpeg1?, layer): kbps by index
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def _skip_id3(data, pos):
+    if data[pos : pos + 3] == b"ID3" and len(data) >= pos + 10:
+        size = 0
+        for byte in data[pos + 6 : pos + 10]:
+            size = (size << 7) | (byte & 0x7F)
+        return pos + 10 + size
+    return pos
+
+
+# ✅ Function: Duration of MP3 bytes by walking the frame headers (no decoding)
+def mp3_duration(data):
+    """
+    Returns the duration in seconds of MPEG audio bytes (what gTTS produces),
+    or 0.0 if no valid frame is found.
+    """
+    pos = 0
+    seconds = 0.0
+    length = len(data)
+    while pos + 4 <= length:
+        pos = _skip_id3(data, pos)
+        if pos + 4 > length:
+            break
+        header = int.from_bytes(data[pos : pos + 4], "big")
+        if header >> 21 != 0x7FF:
+            pos += 1
+            continue
+
+        version = (header >> 19) & 0b11
+        layer = 4 - ((header >> 17) & 0b11)
+        bitrate_index = (header >> 12) & 0b1111
+        rate_index = (header >> 10) & 0b11
+        padding = (header >> 9) & 0b1
+        if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+            pos += 1
+            continue
+
+        mpeg1 = version == 3
+        bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+        sample_rate = _SAMPLE_RATES[version][rate_index]
+        if layer == 1:
+            samples = 384
+            frame_length = (12 * bitrate // sample_rate + padding) * 4
+        else:
+            samples = 1152 if (layer == 2 or mpeg1) else 576
+            frame_length = samples // 8 * bitrate // sample_rate + padding
+
+        seconds += samples / sample_rate
+        pos += max(frame_length, 1)
+    return seconds
+
+
+# ✅ Function: gTTS straight to bytes (no temp file, no sleep)
+def synthesize_gtts(text, lang="en", slow=False):
+    from gtts import gTTS
+
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=lang, slow=slow).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+# ✅ Function: Synthesize and verify one job; errors are returned, not raised
+def _run_job(synthesize, text, min_bytes):
+    try:
+        data = synthesize(text)
+        duration = mp3_duration(data)
+        if len(data) < min_bytes or duration <= 0:
+            raise ValueError(f"audio too small or empty ({len(data)} bytes, {duration:.2f}s)")
+        # Cached synthesizers (tts_cache.cached_synthesizer) keep only verified,
+        # freshly synthesized audio; cache hits are not written again
+        store = getattr(synthesize, "store", None)
+        if store is not None and not getattr(data, "from_cache", False):
+            store(text, data, duration)
+        return {"audio": data, "duration": duration, "error": None}
+    except Exception as e:
+        return {"audio": None, "duration": 0.0, "error": e}
+
+
+# ✅ Function: Run TTS for many texts on a bounded worker pool
+def synthesize_many(texts, synthesize=synthesize_gtts, max_workers=4, min_bytes=1000):
+    """
+    Returns one result per text, in the same order as texts:
+    {"audio": bytes, "duration": seconds, "error": None} on success, or
+    {"audio": None, "duration": 0.0, "error": exception} on failure.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(texts)))) as pool:
+        return list(pool.map(lambda text: _run_job(synthesize, text, min_bytes), texts))
@@ -1,3 +1,10 @@
+from slide_json_parser import clean_and_parse_json
+from render_manifest import RenderManifest, DEFAULT_SEGMENT_CACHE_DIR, segment_fingerprint
+from video_encoder import concat_segments
+from tts_scheduler import synthesize_many, synthesize_gtts, mp3_duration
+from tts_cache import TTSCache, cached_synthesizer
+
+
 # ✅ Function: Create highlighted text with color highlighting
 def make_highlighted_text(topic, headings, highlight_index):
     lines = [topic, ""]
@@ -23,52 +30,31 @@ def save_to_simple_text(filename):
         return ""
 
 
-# ✅ Function: Extract JSON safely
-def clean_and_parse_json(text_output):
-    """
-    Extracts valid JSON from LLM output and parses it safely.
-    """
-    # ✅ Debug: print pehle 500 characters
-    print("\n🔍 Raw text preview:", text_output[:500])
-
-    # ✅ Extract JSON part using regex (first {...} block)
-    json_match = re.search(r"\{.*\}", text_output, re.DOTALL)
-    if not json_match:
-        print("❌ No JSON object found in text. Returning None.")
-        return None
-
-    json_str = json_match.group(0)
-
-    try:
-        slides = json.loads(json_str)
-        print("✅ JSON parsed successfully")
-        return slides
-    except json.JSONDecodeError as e:
-        print("❌ JSON parsing failed:", e)
-        return None
-
-
 # ✅ Updated Function: Generate separate audio for each heading
-def generate_audio_from_slides(slides_json):
+def generate_audio_from_slides(slides_json, max_workers=4, synthesize=None):
     """
     Generate separate audio files for each heading with their content
+
+    Headings go through the TTS cache (gTTS by default, same entries as
+    extra_function_of_videoandaudio), so unchanged headings are not sent to
+    gTTS again. Files are named by cache key, not by slide/heading index;
+    a custom synthesize must come from cached_synthesizer (it provides .key).
     """
+    synthesize = synthesize or cached_synthesizer(
+        synthesize_gtts, TTSCache(tts_cache_dir, tts_cache_max_bytes),
+        "gtts", "default", "normal", "en", "mp3", mp3_duration,
+    )
     all_audio_files = []
     all_transcripts = []
     all_slide_info = []  # Store slide and heading info
 
+    jobs = []
     for slide_idx, (slide_name, slide_content) in enumerate(
         slides_json.items(), start=1
     ):
         print(f"🎤 Processing slide {slide_idx}: {slide_name}")
 
-        slide_audio_files = []
-        slide_transcripts = []
-        slide_heading_info = []
-
         for heading_idx, (heading, content) in enumerate(slide_content.items()):
-            print(f"  📝 Creating audio for heading: {heading}")
-
             # Create transcript for this specific heading (without "Now discussing")
             transcript_parts = [heading]  # Start with heading name directly
 
@@ -79,64 +65,65 @@ def generate_audio_from_slides(slides_json):
                 transcript_parts.append(content)
 
             # Join all parts into one transcript for this heading
-            heading_transcript = ". ".join(transcript_parts)
-
-            try:
-                # Generate TTS audio for this heading
-                tts = gTTS(text=heading_transcript, lang="en")
-                audio_filename = f"slide_{slide_idx}_heading_{heading_idx+1}_{heading.replace(' ', '_')}.mp3"
-                tts.save(audio_filename)
-
-                slide_audio_files.append(audio_filename)
-                slide_transcripts.append(heading_transcript)
-                slide_heading_info.append(
-                    {
-                        "slide_name": slide_name,
-                        "heading": heading,
-                        "heading_index": heading_idx,
-                    }
-                )
-
-                print(f"    ✅ Audio saved: {audio_filename}")
+            jobs.append((". ".join(transcript_parts), {
+                "slide_name": slide_name,
+                "heading": heading,
+                "heading_index": heading_idx,
+            }))
+
+    print(f"🎵 Synthesizing {len(jobs)} headings ({max_workers} workers, cached)...")
+    results = synthesize_many(
+        [transcript for transcript, _ in jobs], synthesize=synthesize, max_workers=max_workers
+    )
+
+    for (heading_transcript, info), result in zip(jobs, results):
+        heading = info["heading"]
+        audio_filename = f"{synthesize.key(heading_transcript)}.mp3"
+
+        if result["error"] is None:
+            with open(audio_filename, "wb") as f:
+                f.write(result["audio"])
+            all_audio_files.append(audio_filename)
+            all_transcripts.append(heading_transcript)
+            all_slide_info.append(info)
+            print(f"    ✅ Audio saved: {audio_filename}")
+            continue
 
-            except Exception as e:
-                print(f"    ❌ Failed to generate audio for {heading}: {e}")
-                # Create fallback silent audio
-                try:
-                    silence = AudioClip(make_frame=lambda t: 0, duration=2)
-                    fallback_filename = (
-                        f"slide_{slide_idx}_heading_{heading_idx+1}_silence.mp3"
-                    )
-                    silence.write_audiofile(
-                        fallback_filename, verbose=False, logger=None
-                    )
-                    slide_audio_files.append(fallback_filename)
-                    slide_transcripts.append(f"{heading} - Audio generation failed")
-                    slide_heading_info.append(
-                        {
-                            "slide_name": slide_name,
-                            "heading": heading,
-                            "heading_index": heading_idx,
-                        }
-                    )
-                except:
-                    print(f"    ❌ Could not create fallback audio for {heading}")
-
-        all_audio_files.extend(slide_audio_files)
-        all_transcripts.extend(slide_transcripts)
-        all_slide_info.extend(slide_heading_info)
+        print(f"    ❌ Failed to generate audio for {heading}: {result['error']}")
+        # Create fallback silent audio
+        try:
+            silence = AudioClip(make_frame=lambda t: 0, duration=2)
+            fallback_filename = f"{synthesize.key(heading)}_silence.mp3"
+            silence.write_audiofile(
+                fallback_filename, verbose=False, logger=None
+            )
+            all_audio_files.append(fallback_filename)
+            all_transcripts.append(f"{heading} - Audio generation failed")
+            all_slide_info.append(info)
+        except:
+            print(f"    ❌ Could not create fallback audio for {heading}")
 
     return all_audio_files, all_transcripts, all_slide_info
 
 
 # ✅ Function: Create video with dynamic highlighting and proper captions
 def create_slides_video_with_audio(
-    slides_json, audio_files, transcripts, slide_info, output_file="video.mp4"
+    slides_json,
+    audio_files,
+    transcripts,
+    slide_info,
+    output_file="video.mp4",
+    segment_cache_dir=DEFAULT_SEGMENT_CACHE_DIR,
 ):
     """
     Create a video with dynamic highlighting per heading and synced captions
+
+    Each heading is encoded to its own file in segment_cache_dir (None keeps
+    everything in one MoviePy render); headings whose slide, transcript and
+    audio did not change are reused and the files are joined by stream copy.
     """
     video_segments = []
+    manifest = RenderManifest(segment_cache_dir) if segment_cache_dir else None
 
     for i, (audio_file, transcript, info) in enumerate(
         zip(audio_files, transcripts, slide_info)
@@ -155,6 +142,23 @@ def create_slides_video_with_audio(
         slide_content = slides_json[info["slide_name"]]
         headings = list(slide_content.keys())
 
+        # ✅ Same slide, transcript and audio as an earlier render: reuse its segment
+        if manifest is not None:
+            fingerprint = segment_fingerprint({
+                "title": info["slide_name"],
+                "headings": headings,
+                "highlight_index": info["heading_index"],
+                "captions": [(0.0, duration, transcript)],
+                "audio": audio_file,
+                "preset": "textclip",  # TextClip layout, never shared with the Pillow renderer
+            })
+            cached = manifest.lookup(fingerprint)
+            if cached:
+                audio_clip.close()
+                video_segments.append(cached)
+                print(f"♻️ Reused segment for: {info['heading']}")
+                continue
+
         # Create text clips with color highlighting
         text_clips = []
         y_position = 80
@@ -221,23 +225,39 @@ def create_slides_video_with_audio(
         all_clips = [bg_clip] + text_clips + [captions_clip]
         segment = CompositeVideoClip(all_clips).set_audio(audio_clip)
 
+        if manifest is not None:
+            # ✅ Encode this heading once and keep it for later renders
+            segment_file = manifest.segment_path(fingerprint)
+            segment.write_videofile(
+                segment_file, fps=24, codec="libx264", audio_codec="aac", logger=None
+            )
+            segment.close()
+            audio_clip.close()
+            manifest.record(fingerprint, f"{info['slide_name']} / {info['heading']}")
+            manifest.save()
+            segment = segment_file
+
         video_segments.append(segment)
         print(f"✅ Created segment for: {info['heading']}")
 
     # Combine all segments
     if video_segments:
         print("🎬 Combining all video segments...")
-        final_clip = concatenate_videoclips(video_segments)
-
         # Create output directory if it doesn't exist
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
-        final_clip.write_videofile(output_file, fps=24)
+        if manifest is not None:
+            # ✅ Segment files share one encoding, so they are joined without re-encoding
+            concat_segments(video_segments, output_file)
+            manifest.prune()
+        else:
+            final_clip = concatenate_videoclips(video_segments)
+            final_clip.write_videofile(output_file, fps=24)
 
-        # Cleanup
-        for seg in video_segments:
-            seg.close()
-        final_clip.close()
+            # Cleanup
+            for seg in video_segments:
+                seg.close()
+            final_clip.close()
 
         print(f"🎬 Video saved with dynamic highlighting: {output_file}")
     else:
@@ -245,41 +265,48 @@ def create_slides_video_with_audio(
 
 
 # ------------------ MAIN FLOW ------------------ #
-# ✅ Step 1: Load text result
-text_output = save_to_simple_text("my_result.txt")
+if __name__ == "__main__":
+    # ✅ TextClip needs ImageMagick; MoviePy's config is only touched when this video is made
+    if imagemagick_binary:
+        from moviepy.config import change_settings
 
-# ✅ Step 2: Parse into JSON (returns dict)
-slides_json = clean_and_parse_json(text_output)
+        change_settings({"IMAGEMAGICK_BINARY": imagemagick_binary})
 
-if not slides_json:
-    raise ValueError("❌ Could not parse slides JSON. Please check LLM output.")
+    # ✅ Step 1: Load text result
+    text_output = save_to_simple_text("my_result.txt")
 
-# ✅ Step 3: Generate separate audios for each heading
-print("🎵 Generating individual audio files for each heading...")
-audio_files, transcripts, slide_info = generate_audio_from_slides(slides_json)
+    # ✅ Step 2: Parse into JSON (returns dict)
+    slides_json = clean_and_parse_json(text_output)
 
-print(f"✅ Generated {len(audio_files)} individual audio segments")
+    if not slides_json:
+        raise ValueError("❌ Could not parse slides JSON. Please check LLM output.")
 
-# ✅ Step 4: Ask user for video name and generate final video
-path = r"../Video_lectures"
-video_lect = input("Enter the video name (without extension): ")
+    # ✅ Step 3: Generate separate audios for each heading
+    print("🎵 Generating individual audio files for each heading...")
+    audio_files, transcripts, slide_info = generate_audio_from_slides(slides_json)
 
-# ✅ Create video with dynamic highlighting and proper captions
-create_slides_video_with_audio(
-    slides_json, audio_files, transcripts, slide_info, f"{path}/{video_lect}.mp4"
-)
+    print(f"✅ Generated {len(audio_files)} individual audio segments")
 
-# ✅ Optional: Cleanup temporary audio files
-cleanup_choice = input("Do you want to delete temporary audio files? (y/n): ")
-if cleanup_choice.lower() == "y":
-    for audio_file in audio_files:
-        try:
-            os.remove(audio_file)
-            print(f"🗑️ Deleted: {audio_file}")
-        except Exception as e:
-            print(f"⚠️ Could not delete {audio_file}: {e}")
+    # ✅ Step 4: Ask user for video name and generate final video
+    path = r"../Video_lectures"
+    video_lect = input("Enter the video name (without extension): ")
+
+    # ✅ Create video with dynamic highlighting and proper captions
+    create_slides_video_with_audio(
+        slides_json, audio_files, transcripts, slide_info, f"{path}/{video_lect}.mp4"
+    )
+
+    # ✅ Optional: Cleanup temporary audio files
+    cleanup_choice = input("Do you want to delete temporary audio files? (y/n): ")
+    if cleanup_choice.lower() == "y":
+        for audio_file in audio_files:
+            try:
+                os.remove(audio_file)
+                print(f"🗑️ Deleted: {audio_file}")
+            except Exception as e:
+                print(f"⚠️ Could not delete {audio_file}: {e}")
 
-print("🎉 Video creation completed with dynamic highlighting and synced captions!")
+    print("🎉 Video creation completed with dynamic highlighting and synced captions!")
 
-# Required packages:
-# pip install moviepy gtts
+    # Required packages:
+    # pip install moviepy gtts
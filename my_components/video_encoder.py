@@ -0,0 +1,194 @@
+import os
+import shutil
+import tempfile
+import subprocess
+
+import numpy as np
+
+
+# ✅ Function: ffmpeg executable (the one MoviePy/imageio ships, else PATH)
+def ffmpeg_binary():
+    if os.environ.get("IMAGEIO_FFMPEG_EXE"):
+        return os.environ["IMAGEIO_FFMPEG_EXE"]
+    try:
+        import imageio_ffmpeg
+
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return shutil.which("ffmpeg") or "ffmpeg"
+
+
+# ✅ Function: libx264 + AAC output options
+def x264_args(preset="veryfast", tune="stillimage", threads=0, crf=23, fps=24):
+    """
+    tune="stillimage" suits slides (tune=None disables it); threads=0 lets
+    x264 use every core. yuv420p keeps the output playable everywhere.
+    """
+    args = ["-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-threads", str(threads)]
+    if tune:
+        args += ["-tune", tune]
+    args += ["-pix_fmt", "yuv420p", "-r", str(fps)]
+    return args
+
+
+AUDIO_ARGS = ["-c:a", "aac", "-b:a", "192k", "-ar", "44100"]
+
+
+def run_ffmpeg(args):
+    result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        tail = result.stderr.decode("utf-8", "replace")[-2000:]
+        raise RuntimeError(f"ffmpeg failed ({result.returncode}):\n{tail}")
+
+
+# ✅ Class: Stream raw RGB frames into an ffmpeg subprocess
+class FramePipeEncoder:
+    """
+    with FramePipeEncoder("out.mp4", (1280, 720), audio_path="audio.wav") as enc:
+        for frame in frames:
+            enc.write(frame)
+
+    Frames are uint8 arrays of shape (height, width, 3) and go straight to
+    ffmpeg's stdin; nothing is written to disk in between.
+    """
+
+    def __init__(self, output_file, size, fps=24, audio_path=None, **encoder_options):
+        width, height = size
+        args = [
+            ffmpeg_binary(), "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}",
+            "-r", str(fps), "-i", "-",
+        ]
+        if audio_path:
+            args += ["-i", audio_path]
+        args += x264_args(fps=fps, **encoder_options)
+        if audio_path:
+            args += AUDIO_ARGS + ["-shortest"]
+        args.append(output_file)
+
+        self.output_file = output_file
+        self._process = subprocess.Popen(args, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def write(self, frame, repeat=1):
+        data = np.ascontiguousarray(frame, dtype=np.uint8).tobytes()
+        for _ in range(repeat):
+            self._process.stdin.write(data)
+
+    def close(self):
+        if self._process.stdin and not self._process.stdin.closed:
+            self._process.stdin.close()
+        stderr = self._process.stderr.read().decode("utf-8", "replace")
+        if self._process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed ({self._process.returncode}):\n{stderr[-2000:]}")
+        return self.output_file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._process.kill()
+            self._process.wait()
+
+
+# ✅ Function: Encode a whole MoviePy clip through the pipe
+def encode_clip_frames(clip, output_file, audio_path=None, fps=24, **encoder_options):
+    size = (int(clip.w), int(clip.h))
+    with FramePipeEncoder(output_file, size, fps, audio_path, **encoder_options) as encoder:
+        for frame in clip.iter_frames(fps=fps, dtype="uint8"):
+            encoder.write(frame)
+    return output_file
+
+
+# ✅ Function: Pipe still images, each repeated for its duration (no MoviePy clip)
+def encode_still_frames(stills, output_file, size, audio_path=None, fps=24, **encoder_options):
+    """
+    stills: iterable of (uint8 RGB array, seconds). Frame counts follow the
+    running total, so rounding never adds up to audio drift.
+    """
+    elapsed, written = 0.0, 0
+    with FramePipeEncoder(output_file, size, fps, audio_path, **encoder_options) as encoder:
+        for image, seconds in stills:
+            elapsed += seconds
+            frames = max(int(round(elapsed * fps)) - written, 1)
+            encoder.write(image, repeat=frames)
+            written += frames
+    return output_file
+
+
+def _concat_list_entry(path):
+    # Concat demuxer syntax: single quotes escaped as '\''
+    return "file '{}'".format(os.path.abspath(path).replace("'", "'\\''"))
+
+
+# ✅ Function: Slide video from still images with durations plus one audio track
+def encode_stills(stills, output_file, audio_path=None, fps=24, work_dir=None, **encoder_options):
+    """
+    stills: iterable of (image, seconds), where image is a uint8 RGB array or
+    an image file path. Each image is written once as PNG (consumed lazily, so
+    a generator keeps only one frame in memory) and listed in an ffmpeg concat
+    file with its duration, so ffmpeg encodes every slide from a single
+    picture instead of receiving one frame per 1/fps second.
+    """
+    from PIL import Image
+
+    own_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="stills_")
+    try:
+        lines = ["ffconcat version 1.0"]
+        previous_image, previous_path = None, None
+        for i, (image, seconds) in enumerate(stills):
+            if isinstance(image, str):
+                path = image
+            elif image is previous_image:
+                path = previous_path
+            else:
+                path = os.path.join(work_dir, f"still_{i:05d}.png")
+                # Fastest PNG setting: the file is read back once by ffmpeg
+                Image.fromarray(image).save(path, compress_level=1)
+            previous_image, previous_path = image, path
+            lines += [_concat_list_entry(path), f"duration {max(seconds, 1.0 / fps):.6f}"]
+        if len(lines) == 1:
+            raise ValueError("encode_stills needs at least one image")
+        # The last image has to be listed twice or its duration is ignored
+        lines.append(lines[-2])
+
+        list_path = os.path.join(work_dir, "stills.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+        args = [ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_path:
+            args += ["-i", audio_path]
+        args += ["-fps_mode", "cfr"] + x264_args(fps=fps, **encoder_options)
+        if audio_path:
+            args += AUDIO_ARGS + ["-shortest"]
+        args.append(output_file)
+        run_ffmpeg(args)
+        return output_file
+    finally:
+        if own_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# ✅ Function: Join encoded segments with the concat demuxer (no re-encoding)
+def concat_segments(segment_files, output_file, extra_args=()):
+    """
+    All segments must share codecs and encoder settings (as render_segment
+    produces them); streams are copied, so this takes seconds, not minutes.
+    """
+    list_path = f"{os.path.splitext(output_file)[0]}_concat.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write("ffconcat version 1.0\n")
+        f.write("\n".join(_concat_list_entry(path) for path in segment_files) + "\n")
+    try:
+        run_ffmpeg(
+            [ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy"]
+            + list(extra_args)
+            + [output_file]
+        )
+    finally:
+        os.remove(list_path)
+    return output_file